@@ -101,7 +101,8 @@ class ItemHandler(AdminBaseHandler):
 class SettingsHandler(AdminBaseHandler):
     STANDARD_SETTINGS = [
         'author_name', 'site_title', 'site_blurb', 'site_host', 'advanced_mode',
-        'google_profile', 'feedburner_address', 'google_analytics'
+        'google_profile', 'feedburner_address', 'google_analytics',
+        'code_language'
     ]
     """Handler for settings viewing and deletion"""
     def get(self):
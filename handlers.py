@@ -8,6 +8,8 @@ import logging
 import models
 import os
 
+from lib import helpers
+
 class SlashRedirectHandler(webapp.RequestHandler):
     """Strip off slashes and permanent redirect to the slashless path"""
     def get(self, path):
@@ -90,6 +92,7 @@ class RootHandler(SiteHandler):
                 'item': root,
                 'posts': posts.fetch(10)
             })
+            html = helpers.minify_html(html)
             memcache.set('root_html', html)
 
         self.render_text_to_response(html)
@@ -110,6 +113,7 @@ class ArchiveHandler(RootHandler):
                 'item': root,
                 'posts': posts
             })
+            html = helpers.minify_html(html)
             memcache.set('archive_html', html)
 
         self.render_text_to_response(html)
@@ -118,16 +122,37 @@ class FeedHandler(RootHandler):
     def get(self):
         # When feedburner is enabled, only give feedburner bot access
         # to the feed, all others get redirected
-        feed_address = models.Setting.get_dictionary()['feedburner_address']
+        settings = models.Setting.get_dictionary()
+        feed_address = settings['feedburner_address']
         if feed_address:
             userAgent = self.request.headers.get('User-Agent', '').lower()
             if not 'feedburner' in userAgent:
                 return self.redirect(feed_address)
 
         root, posts = self.root_and_posts()
-
-        # Render the feed
-        self.render_template_to_response('atom', {
-            'item': root,
-            'posts': posts.fetch(10)
-        }, 'feed')
+        posts = posts.fetch(10)
+
+        # Assemble the feed from cached entries
+        updated = year = None
+        items = posts
+        if posts:
+            updated = posts[0].updated_date
+            year = posts[0].publish_date.year
+            if root and root.content_html:
+                items = [root] + posts
+        elif root:
+            year = root.publish_date.year
+        entries = models.Item.get_feed_entries(items, settings.get('site_host'))
+
+        self.response.content_type = 'application/atom+xml; charset=utf-8'
+        for chunk in helpers.atom_feed(settings, entries, updated, year):
+            self.response.out.write(chunk)
+
+class WarmupHandler(webapp.RequestHandler):
+    """Handle warmup requests, loading what converting content needs before
+    a new instance serves its first request"""
+    def get(self):
+        code_language = models.Setting.get_dictionary().get('code_language')
+        timings = helpers.warm_up(code_language)
+        for name, seconds in sorted(timings.items(), key=lambda t: -t[1]):
+            logging.info('Loaded lexer %s in %.1fms' % (name, seconds * 1000))
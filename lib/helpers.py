@@ -2,6 +2,12 @@
 import datetime
 import re
 
+try:
+    from google.appengine.api import memcache
+except ImportError:
+    # Not running on AppEngine (e.g. doctests)
+    memcache = None
+
 # Fix path before markdown and pygments imports
 import os
 import sys
@@ -9,9 +15,15 @@ import sys
 #sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'pygments'))
 sys.path.insert(0, os.path.dirname(__file__))
 
-import markdown
-# Import now, otherwise markdown doesn't find it due to appEngine issues ...
-import pygments
+# markdown and pygments are imported in process_content, so handlers that
+# never convert content don't pay for importing them on a cold start
+MARKDOWN_EXTENSIONS = ['footnotes', 'fenced_code', 'codehilite', 'tables',
+                       'toc', 'meta', 'minify']
+# Enough of the above to render a title line the same way, without pygments
+TITLE_EXTENSIONS = ['footnotes', 'fenced_code', 'tables', 'toc']
+# Lexers loaded by warm_up, so the first post with code on a new instance
+# doesn't pay for compiling them
+PRELOAD_LANGUAGES = ['python', 'javascript', 'html', 'css', 'bash']
 
 DATE_REGEX = re.compile(\
     '(?P<year>\d{4})[ -/.]?(?P<month>\d{2})[ -/.]?(?P<day>\d{2})')
@@ -25,8 +37,43 @@ SLASH_REGEX = re.compile('/+')
 DASH_REGEX = re.compile('-+')
 DASH_ADJACENT_TO_SLASH = re.compile('-*/-*')
 INITIAL_SLASH_DASH = re.compile('^[/\-]+|[\/-]+$')
-
-def process_content(text, fallback_date=None):
+FOOTNOTE_REF = re.compile(r'\[\^([^\]]*)\]')
+# Anything in brackets may be the id of a reference link
+LINK_REF = re.compile(r'\[([^\]]*)\]')
+
+# Atom feed generation
+ATOM_DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+ATOM_ENTRY = u"""<entry>
+    <title>%(title)s</title>
+    <link rel="alternate" type="text/html" href="http://%(host)s%(slug)s" />
+    <id>tag:%(host)s,%(day)s:%(key)s</id>
+    <updated>%(updated)s</updated>
+    <published>%(published)s</published>
+    <content type="html">
+        %(content)s
+    </content>
+</entry>
+"""
+ATOM_HEADER = u"""<?xml version="1.0" encoding="utf-8"?>
+
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title type="html">%(title)s</title>
+  <subtitle type="html">%(subtitle)s</subtitle>
+  <id>http://%(host)s/feed</id>
+  <link rel="alternate" type="text/html" hreflang="en" href="http://%(host)s/" />
+  <link rel="self" type="application/atom+xml" href="http://%(host)s/feed" />
+  <rights>Copyright (c) %(year)s %(author)s</rights>
+  <generator uri="http://www.fortes.com/projects/mashpress/" version="0.1">
+    mashpress 0.1
+  </generator>
+  <author>
+    <name>%(author)s</name>
+    <uri>http://%(host)s/</uri>
+  </author>
+"""
+ATOM_FOOTER = u"</feed>\n"
+
+def process_content(text, fallback_date=None, code_language=None):
     r"""
     Process a block of content text, extracting fields and converting to
     HTML (using Markdown/Textile). Also return a normalized content block
@@ -34,6 +81,9 @@ def process_content(text, fallback_date=None):
 
     fallback_date Year attribute is used as a prefix for slug generation
 
+    code_language is used for code blocks that don't name their language,
+    instead of guessing it
+
     >>> content = u'\nHello World!\n\nThis is my *first* post!'
     >>> year = datetime.date.today().year
     >>> html, data = process_content(content, datetime.date(2010, 10, 10))
@@ -60,15 +110,110 @@ def process_content(text, fallback_date=None):
     >>> html
     u'<p>This is my post!</p>'
     """
+    import markdown
+    # Import now, otherwise markdown doesn't find it due to appEngine issues ...
+    import pygments
+    from markdown.extensions import codehilite
+
+    # Share highlighted code blocks between instances through memcache
+    if codehilite.cache.backend is None and memcache is not None:
+        codehilite.cache.backend = memcache
+
     # Create converter
-    md_processor = markdown.Markdown(
-        ['footnotes', 'fenced_code', 'codehilite', 'tables', 'toc', 'meta'])
+    configs = {}
+    if code_language:
+        configs['codehilite'] = [('default_lang', code_language)]
+    md_processor = markdown.Markdown(MARKDOWN_EXTENSIONS, configs)
 
     # Process content
     html = md_processor.convert(text)
     # Get metadata
     data = md_processor.Meta
 
+    return html, extract_fields(data, html, fallback_date)
+
+def process_metadata(text, fallback_date=None):
+    r"""
+    Return the fields process_content would extract from a block of content
+    text, without converting all of it to HTML. Only the meta-data header is
+    parsed, and only the first paragraph is converted when the title must
+    be taken from the body
+
+    >>> content = u'title: My Post Title\nslug: 2009/slug-name\ndate: 20091015\n\nThis is my post!'
+    >>> data = process_metadata(content)
+    >>> data['slug'], data['title']
+    (u'/2009/slug-name', u'My Post Title')
+    >>> (data['date'].year, data['date'].month, data['date'].day)
+    (2009, 10, 15)
+
+    >>> content = u'\nHello World!\n\nThis is my *first* post!'
+    >>> data = process_metadata(content, datetime.date(2010, 10, 10))
+    >>> data['title'], data['slug']
+    (u'Hello World!', u'/2010/hello-world')
+    >>> process_metadata(u'tags: a\n\n*Hello*\nWorld\n\nMore text')['title']
+    u'Hello'
+    >>> content = u'See [the docs][1] now\n\n[1]: http://x.com\n'
+    >>> process_metadata(content)['title'] == process_content(content)[1]['title']
+    True
+    >>> content = u'~~~~\nimport os\n\nprint os\n~~~~\n\nSome text'
+    >>> data = process_metadata(content, datetime.date(2010, 10, 10))
+    >>> data['title'], data['slug']
+    (u'import os', u'/2010/import-os')
+    """
+    import markdown
+    from markdown.extensions.meta import parseMeta
+    from markdown.extensions.footnotes import DEF_RE
+    from markdown.extensions.fenced_code import FENCED_BLOCK_RE
+    from markdown.preprocessors import ReferencePreprocessor
+
+    # Same clean up markdown does before running the meta preprocessor
+    lines = text.replace('\r\n', '\n').replace('\r', '\n')\
+            .expandtabs(markdown.TAB_LENGTH).split('\n')
+    data, start = parseMeta(lines)
+
+    html = u''
+    if 'title' not in data:
+        # Convert only the first paragraph, which is where the first line
+        # of HTML comes from, along with any footnotes and reference links it
+        # may refer to
+        paragraph = []
+        end = start
+        for end in xrange(start, len(lines)):
+            if lines[end].strip():
+                break
+        # a fenced code block may have blank lines in it
+        fenced = FENCED_BLOCK_RE.match(u'\n'.join(lines[end:]))
+        if fenced:
+            paragraph = lines[end:end + fenced.group(0).count(u'\n') + 1]
+            end += len(paragraph)
+        else:
+            for end in xrange(end, len(lines)):
+                if lines[end].strip():
+                    paragraph.append(lines[end])
+                elif paragraph:
+                    break
+        first = u'\n'.join(paragraph)
+        notes = set(FOOTNOTE_REF.findall(first))
+        refs = set([ref.strip().lower() for ref in LINK_REF.findall(first)])
+        if notes or refs:
+            paragraph.append(u'')
+            for line in lines[end:]:
+                match = DEF_RE.match(line)
+                if match and match.group(2) in notes:
+                    paragraph.append(line)
+                    continue
+                match = ReferencePreprocessor.RE.match(line)
+                if match and match.group(2).strip().lower() in refs:
+                    paragraph.append(line)
+        html = markdown.Markdown(TITLE_EXTENSIONS).convert(u'\n'.join(paragraph))
+
+    return extract_fields(data, html, fallback_date)
+
+def extract_fields(data, html, fallback_date=None):
+    """Turn meta-data read by the meta extension into title, slug and date,
+    filling in the title from the first line of html and the slug from the
+    title when they are missing
+    """
     # Convert the date, if there
     if 'date' in data:
         data['date'] = parse_datetime(data['date'][0])
@@ -95,7 +240,41 @@ def process_content(text, fallback_date=None):
 
         data['slug'] = slugify("%s/%s" % (date.year, data['title']))
 
-    return html, data
+    return data
+
+def warm_up(code_language=None):
+    """Import markdown with its extensions and load the lexers for
+    PRELOAD_LANGUAGES and code_language before the first request that
+    converts content. Returns the seconds spent loading each lexer
+
+    >>> timings = warm_up('ruby')
+    >>> sorted(timings) == sorted(PRELOAD_LANGUAGES + ['ruby'])
+    True
+    """
+    import markdown
+    from pygments.lexers import preload_lexers
+
+    markdown.Markdown(MARKDOWN_EXTENSIONS)
+    languages = list(PRELOAD_LANGUAGES)
+    if code_language and code_language not in languages:
+        languages.append(code_language)
+    return preload_lexers(languages)
+
+def minify_html(html):
+    """Collapse insignificant whitespace in rendered HTML, leaving <pre>
+    blocks and the like alone. Content is minified by markdown when it is
+    saved; use this for whole pages before caching them
+
+    >>> minify_html(u'<div>\\n    <p>Hello   world</p>\\n\\n</div>\\n')
+    u'<div>\\n<p>Hello world</p>\\n</div>'
+
+    Pages rendered by templates are UTF-8 encoded strings, and stay that way
+
+    >>> minify_html('<p>caf\\xc3\\xa9</p>\\n\\n<p>x</p>')
+    '<p>caf\\xc3\\xa9</p>\\n<p>x</p>'
+    """
+    from minifier import minify
+    return minify(html)
 
 def slugify(text):
     """Convert the string into a slug-safe format
@@ -196,6 +375,93 @@ def parse_datetime(text):
     # Couldn't find anything
     return None
 
+def escape(text):
+    """Escape text for inclusion in HTML or XML, like Django's escape filter
+
+    >>> escape(u'<a href="/">Tom & Jerry</a>')
+    u'&lt;a href=&quot;/&quot;&gt;Tom &amp; Jerry&lt;/a&gt;'
+    >>> escape(None)
+    u''
+    """
+    if not text:
+        return u''
+    return unicode(text).replace('&', '&amp;').replace('<', '&lt;')\
+            .replace('>', '&gt;').replace('"', '&quot;').replace("'", '&#39;')
+
+def atom_entry(item, site_host):
+    """Render an item as an Atom <entry> fragment. The fragment only
+    depends on the item and the host, so callers can cache it for as long
+    as the item's updated_date stays the same
+
+    >>> class Item(object):
+    ...     title = u'Fish & Chips'
+    ...     slug = u'/2010/fish-chips'
+    ...     content_html = u'<p>Tasty</p>'
+    ...     publish_date = datetime.datetime(2010, 10, 10, 8, 30)
+    ...     updated_date = datetime.datetime(2010, 10, 11, 9, 45, 5)
+    ...     def key(self):
+    ...         return 'abc'
+    >>> print atom_entry(Item(), 'example.com'),
+    <entry>
+        <title>Fish &amp; Chips</title>
+        <link rel="alternate" type="text/html" href="http://example.com/2010/fish-chips" />
+        <id>tag:example.com,2010-10-10:abc</id>
+        <updated>2010-10-11T09:45:05Z</updated>
+        <published>2010-10-10T08:30:00Z</published>
+        <content type="html">
+            &lt;p&gt;Tasty&lt;/p&gt;
+        </content>
+    </entry>
+    """
+    return ATOM_ENTRY % {
+        'title': escape(item.title),
+        'host': site_host,
+        'slug': escape(item.slug),
+        'day': item.publish_date.strftime('%Y-%m-%d'),
+        'key': escape(str(item.key())),
+        'updated': item.updated_date.strftime(ATOM_DATE_FORMAT),
+        'published': item.publish_date.strftime(ATOM_DATE_FORMAT),
+        'content': escape(item.content_html),
+    }
+
+def atom_feed(settings, entries, updated=None, year=None):
+    """Generate an Atom feed piece by piece from pre-rendered <entry>
+    fragments (see atom_entry), so it can be written straight to the
+    response without building the whole document first
+
+    updated is the datetime of the most recent change; when missing,
+    entries are left out, matching a site without posts
+
+    >>> settings = {'site_title': u'Blog', 'site_host': 'example.com',
+    ...             'author_name': u'Me'}
+    >>> feed = u''.join(atom_feed(settings, [u'<entry/>\\n'],
+    ...                           datetime.datetime(2010, 10, 11), 2010))
+    >>> print feed[feed.index('<rights>'):],
+    <rights>Copyright (c) 2010 Me</rights>
+      <generator uri="http://www.fortes.com/projects/mashpress/" version="0.1">
+        mashpress 0.1
+      </generator>
+      <author>
+        <name>Me</name>
+        <uri>http://example.com/</uri>
+      </author>
+      <updated>2010-10-11T00:00:00Z</updated>
+    <entry/>
+    </feed>
+    """
+    yield ATOM_HEADER % {
+        'title': escape(settings.get('site_title')),
+        'subtitle': escape(settings.get('site_blurb')),
+        'host': settings.get('site_host') or '',
+        'year': year or '',
+        'author': escape(settings.get('author_name')),
+    }
+    if updated:
+        yield u'  <updated>%s</updated>\n' % updated.strftime(ATOM_DATE_FORMAT)
+        for entry in entries:
+            yield entry
+    yield ATOM_FOOTER
+
 # Test when standalone
 def _test():
     """Run doctests"""
@@ -72,6 +72,7 @@ BLOCK_LEVEL_ELEMENTS = re.compile("p|div|h[1-6]|blockquote|pre|table|dl|ol|ul"
                                   "|ins|del|hr|hr/|style|li|dt|dd|thead|tbody"
                                   "|tr|th|td")
 DOC_TAG = "div"     # Element used to wrap document - later removed
+BLANK_LINES_RE = re.compile(r'\n\s+\n')
 
 # Placeholders
 STX = u'\u0002'  # Use STX ("Start of text") for start-of-placeholder
@@ -118,6 +119,32 @@ def isBlockLevel(tag):
     """Check if the tag is a block level HTML tag."""
     return BLOCK_LEVEL_ELEMENTS.match(tag)
 
+
+# Registry of compiled regular expressions shared by all Markdown instances.
+# The re module has its own cache, but it only holds 100 entries and is
+# emptied as a whole when full, which pygments does readily.
+_compiled_regexps = {}
+MAX_COMPILED_REGEXPS = 1000
+
+def compileRegExp(pattern, flags=0):
+    """
+    Return `pattern` compiled with `flags`, compiling it only once per process.
+
+    Use this for patterns that are built at run time (e.g. per instance or
+    per document), module level constants can simply use re.compile.
+
+    """
+    key = (pattern, flags)
+    try:
+        return _compiled_regexps[key]
+    except KeyError:
+        if len(_compiled_regexps) >= MAX_COMPILED_REGEXPS:
+            # Patterns built from document text could otherwise grow the
+            # registry forever
+            _compiled_regexps.clear()
+        compiled = _compiled_regexps[key] = re.compile(pattern, flags)
+        return compiled
+
 """
 MISC AUXILIARY CLASSES
 =============================================================================
@@ -207,6 +234,10 @@ class Markdown:
         """
 
         self.safeMode = safe_mode
+        # Keep the constructor arguments so worker processes can build an
+        # identically configured instance (see convert_many)
+        self.init_args = (extensions, extension_configs, safe_mode,
+                          output_format)
         self.registeredExtensions = []
         self.docType = ""
         self.stripTopLevelTags = True
@@ -384,7 +415,7 @@ class Markdown:
 
         source = source.replace(STX, "").replace(ETX, "")
         source = source.replace("\r\n", "\n").replace("\r", "\n") + "\n\n"
-        source = re.sub(r'\n\s+\n', '\n\n', source)
+        source = BLANK_LINES_RE.sub('\n\n', source)
         source = source.expandtabs(TAB_LENGTH)
 
         # Split into lines and run the line preprocessors.
@@ -422,6 +453,43 @@ class Markdown:
 
         return output.strip()
 
+    def iterconvert(self, sources, processes=None, chunksize=1):
+        """
+        Convert many markdown documents, yielding (html, meta) pairs in order.
+
+        The same instance is reused for every document and reset() is called
+        before each conversion so no state leaks between documents. `meta` is
+        the dictionary produced by the "meta" extension, or an empty
+        dictionary if that extension is not loaded.
+
+        Keyword arguments:
+
+        * sources: An iterable of source texts as Unicode strings.
+        * processes: If given, convert across a pool of that many worker
+          processes, each holding one identically configured instance. Use
+          0 for one worker per CPU.
+        * chunksize: Number of documents handed to a worker at a time.
+
+        """
+        if processes is not None:
+            for result in _pool_convert(self.init_args, sources,
+                                        processes, chunksize):
+                yield result
+            return
+
+        for source in sources:
+            self.reset()
+            html = self.convert(source)
+            yield html, getattr(self, 'Meta', {})
+
+    def convert_many(self, sources, processes=None, chunksize=1):
+        """
+        Convert many markdown documents and return a list of (html, meta)
+        pairs in the same order as `sources`. See iterconvert().
+
+        """
+        return list(self.iterconvert(sources, processes, chunksize))
+
     def convertFile(self, input=None, output=None, encoding=None):
         """Converts a markdown file and returns the HTML as a unicode string.
 
@@ -465,6 +533,38 @@ class Markdown:
             output.write(html.encode(encoding))
 
 
+# Per-process instance used by convert_many() worker processes
+_worker_markdown = None
+
+def _init_worker(init_args):
+    """ Build the Markdown instance reused by a worker process. """
+    global _worker_markdown
+    extensions, extension_configs, safe_mode, output_format = init_args
+    _worker_markdown = Markdown(extensions=extensions,
+                                extension_configs=extension_configs,
+                                safe_mode=safe_mode,
+                                output_format=output_format)
+
+def _worker_convert(source):
+    """ Convert one document inside a worker process. """
+    _worker_markdown.reset()
+    html = _worker_markdown.convert(source)
+    return html, getattr(_worker_markdown, 'Meta', {})
+
+def _pool_convert(init_args, sources, processes, chunksize):
+    """ Convert `sources` in order across a pool of worker processes. """
+    # Not available everywhere (e.g. AppEngine), so only import when asked
+    import multiprocessing
+    pool = multiprocessing.Pool(processes or None, _init_worker, (init_args,))
+    try:
+        for result in pool.imap(_worker_convert, sources, chunksize):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
 """
 Extensions
 -----------------------------------------------------------------------------
@@ -513,6 +613,29 @@ class Extension:
             'method.' % (self.__class__.__module__, self.__class__.__name__)
 
 
+# Extension modules already imported by load_extension, keyed by name
+_extension_modules = {}
+
+def _import_extension(ext_name):
+    """Import the module for extension `ext_name`, or return None."""
+
+    # Setup the module names
+    ext_module = 'markdown.extensions'
+    module_name_new_style = '.'.join([ext_module, ext_name])
+    module_name_old_style = '_'.join(['mdx', ext_name])
+
+    # Try loading the extention first from one place, then another
+    try: # New style (markdown.extensons.<extension>)
+        return __import__(module_name_new_style, {}, {}, [ext_module])
+    except ImportError:
+        try: # Old style (mdx.<extension>)
+            return __import__(module_name_old_style)
+        except ImportError:
+           message(WARN, "Failed loading extension '%s' from '%s' or '%s'"
+               % (ext_name, module_name_new_style, module_name_old_style))
+           return None
+
+
 def load_extension(ext_name, configs = []):
     """Load extension by name, then return the module.
 
@@ -530,22 +653,13 @@ def load_extension(ext_name, configs = []):
         pairs = [x.split("=") for x in ext_args.split(",")]
         configs.update([(x.strip(), y.strip()) for (x, y) in pairs])
 
-    # Setup the module names
-    ext_module = 'markdown.extensions'
-    module_name_new_style = '.'.join([ext_module, ext_name])
-    module_name_old_style = '_'.join(['mdx', ext_name])
-
-    # Try loading the extention first from one place, then another
-    try: # New style (markdown.extensons.<extension>)
-        module = __import__(module_name_new_style, {}, {}, [ext_module])
-    except ImportError:
-        try: # Old style (mdx.<extension>)
-            module = __import__(module_name_old_style)
-        except ImportError:
-           message(WARN, "Failed loading extension '%s' from '%s' or '%s'"
-               % (ext_name, module_name_new_style, module_name_old_style))
-           # Return None so we don't try to initiate none-existant extension
-           return None
+    module = _extension_modules.get(ext_name)
+    if module is None:
+        module = _import_extension(ext_name)
+        if module is None:
+            # Return None so we don't try to initiate none-existant extension
+            return None
+        _extension_modules[ext_name] = module
 
     # If the module is loaded successfully, we expect it to define a
     # function called makeExtension()
@@ -5,16 +5,25 @@ COMMAND-LINE SPECIFIC STUFF
 """
 
 import markdown
+import codecs
+import os
 import sys
+import time
+import itertools
+import tempfile
 import optparse
 import logging
 from logging import DEBUG, INFO, WARN, ERROR, CRITICAL
 
+# Files picked up when a directory is given as input
+INPUT_EXTENSIONS = ('.md', '.markdown', '.mdown', '.mkd', '.text', '.txt')
+
 def parse_options():
     """
     Define and parse `optparse` options for command-line usage.
     """
     usage = """%prog [options] [INPUTFILE]
+       %prog [options] INPUTFILE|DIRECTORY ...
        (STDIN is assumed if no INPUTFILE is given)"""
     desc = "A Python implementation of John Gruber's Markdown. " \
            "http://www.freewisdom.org/projects/python-markdown/"
@@ -22,7 +31,8 @@ def parse_options():
     
     parser = optparse.OptionParser(usage=usage, description=desc, version=ver)
     parser.add_option("-f", "--file", dest="filename", default=sys.stdout,
-                      help="write output to OUTPUT_FILE",
+                      help="write output to OUTPUT_FILE (single input "
+                      "only)",
                       metavar="OUTPUT_FILE")
     parser.add_option("-e", "--encoding", dest="encoding",
                       help="encoding for input and output files",)
@@ -43,13 +53,26 @@ def parse_options():
                       help="print debug messages")
     parser.add_option("-x", "--extension", action="append", dest="extensions",
                       help = "load extension EXTENSION", metavar="EXTENSION")
+    parser.add_option("-d", "--output_dir", dest="output_dir",
+                      help="with several inputs, write HTML files to "
+                      "OUTPUT_DIR instead of next to each input",
+                      metavar="OUTPUT_DIR")
+    parser.add_option("-j", "--jobs", dest="jobs", type="int", default=None,
+                      help="with several inputs, convert using JOBS worker "
+                      "processes (0 for one per CPU)", metavar="JOBS")
 
     (options, args) = parser.parse_args()
 
     if len(args) == 0:
         input_file = sys.stdin 
-    else:
+    elif len(args) == 1 and not os.path.isdir(args[0]):
         input_file = args[0]
+    else:
+        # Batch mode: every markdown file found in the arguments
+        if options.filename is not sys.stdout:
+            parser.error("-f/--file cannot be used with several inputs or a "
+                         "directory, use -d/--output_dir instead")
+        input_file = find_inputs(args)
 
     if not options.extensions:
         options.extensions = []
@@ -59,7 +82,108 @@ def parse_options():
             'safe_mode': options.safe,
             'extensions': options.extensions,
             'encoding': options.encoding,
-            'output_format': options.output_format}, options.verbose
+            'output_format': options.output_format,
+            'output_dir': options.output_dir,
+            'jobs': options.jobs}, options.verbose
+
+def find_inputs(paths):
+    """
+    Expand files and directories into a list of (path, relative path) pairs.
+
+    Directories are searched recursively for files ending in one of
+    INPUT_EXTENSIONS. The relative path is used to lay out the output tree.
+    """
+    inputs = []
+    for path in paths:
+        if not os.path.isdir(path):
+            inputs.append((path, os.path.basename(path)))
+            continue
+        # os.walk() paths all start with the directory given, so the relative
+        # path is what follows it (os.path.relpath() needs Python 2.6)
+        prefix = os.path.join(path, '')
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in INPUT_EXTENSIONS:
+                    source = os.path.join(dirpath, filename)
+                    inputs.append((source, source[len(prefix):]))
+    return inputs
+
+def write_atomic(path, text, encoding):
+    """
+    Write `text` to `path` so readers never see a partially written file.
+
+    The output goes to a temporary file in the same directory, which is then
+    renamed over the destination.
+    """
+    directory = os.path.dirname(path) or '.'
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        output_file = os.fdopen(fd, 'w')
+        output_file.write(text.encode(encoding))
+        output_file.close()
+        # mkstemp() creates private files, use the usual permissions instead
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0666 & ~umask)
+        if os.name == 'nt' and os.path.exists(path):
+            # rename() does not replace existing files on Windows
+            os.remove(path)
+        os.rename(temp_path, path)
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def convert_files(inputs, output_dir=None, jobs=None, encoding=None,
+                  extensions=[], safe_mode=False,
+                  output_format=markdown.DEFAULT_OUTPUT_FORMAT):
+    """
+    Convert many files with one Markdown instance (or one per worker
+    process when `jobs` is given) and return the number converted.
+
+    Raises MarkdownException, before converting anything, when two inputs
+    would be written to the same HTML file, or an input to itself.
+    """
+    encoding = encoding or "utf-8"
+    destinations = []
+    seen = {}
+    for source, relative in inputs:
+        if output_dir:
+            destination = os.path.join(output_dir, relative)
+        else:
+            destination = source
+        destination = os.path.splitext(destination)[0] + '.html'
+        key = os.path.normcase(os.path.abspath(destination))
+        if key == os.path.normcase(os.path.abspath(source)):
+            raise markdown.MarkdownException(
+                "%s would be overwritten by its own HTML" % source)
+        if key in seen:
+            raise markdown.MarkdownException(
+                "%s and %s would both be written to %s"
+                % (seen[key], source, destination))
+        seen[key] = source
+        destinations.append(destination)
+
+    md = markdown.Markdown(extensions=extensions,
+                           safe_mode=safe_mode,
+                           output_format=output_format)
+
+    def read_sources():
+        for source, relative in inputs:
+            input_file = codecs.open(source, mode="r", encoding=encoding)
+            text = input_file.read()
+            input_file.close()
+            yield text.lstrip(u'\ufeff') # remove the byte-order mark
+
+    results = md.iterconvert(read_sources(), processes=jobs)
+    count = 0
+    for destination, (html, meta) in itertools.izip(destinations, results):
+        write_atomic(destination, html, encoding)
+        count += 1
+    return count
 
 def run():
     """Run Markdown from the command line."""
@@ -69,5 +193,22 @@ def run():
     if not options: sys.exit(0)
     if logging_level: logging.getLogger('MARKDOWN').setLevel(logging_level)
 
+    output_dir = options.pop('output_dir')
+    jobs = options.pop('jobs')
+
     # Run
-    markdown.markdownFromFile(**options)
+    if isinstance(options['input'], list):
+        inputs = options.pop('input')
+        del options['output']
+        start = time.time()
+        try:
+            count = convert_files(inputs, output_dir, jobs, **options)
+        except markdown.MarkdownException, e:
+            sys.stderr.write("%s\n" % e)
+            sys.exit(1)
+        elapsed = max(time.time() - start, 1e-6)
+        if logging_level <= CRITICAL:
+            sys.stderr.write("Converted %d files in %.2fs (%.1f files/s)\n"
+                             % (count, elapsed, count / elapsed))
+    else:
+        markdown.markdownFromFile(**options)
@@ -34,7 +34,14 @@ class AbbrExtension(markdown.Extension):
 
     def extendMarkdown(self, md, md_globals):
         """ Insert AbbrPreprocessor before ReferencePreprocessor. """
+        md.registerExtension(self)
+        self.md = md
         md.preprocessors.add('abbr', AbbrPreprocessor(md), '<reference')
+
+    def reset(self):
+        """ Drop the pattern registered for the previous document. """
+        if 'abbr' in self.md.inlinePatterns:
+            del self.md.inlinePatterns['abbr']
         
            
 class AbbrPreprocessor(markdown.preprocessors.Preprocessor):
@@ -43,48 +50,51 @@ class AbbrPreprocessor(markdown.preprocessors.Preprocessor):
     def run(self, lines):
         '''
         Find and remove all Abbreviation references from the text.
-        Each reference is set as a new AbbrPattern in the markdown instance.
+        All references are matched by a single AbbrPattern in the markdown
+        instance.
         
         '''
         new_text = []
+        abbrs = {}
         for line in lines:
             m = ABBR_REF_RE.match(line)
             if m:
                 abbr = m.group('abbr').strip()
                 title = m.group('title').strip()
-                self.markdown.inlinePatterns['abbr-%s'%abbr] = \
-                    AbbrPattern(self._generate_pattern(abbr), title)
+                if abbr:
+                    abbrs[abbr] = title
             else:
                 new_text.append(line)
+        if abbrs:
+            self.markdown.inlinePatterns['abbr'] = \
+                AbbrPattern(self._generate_pattern(abbrs), abbrs)
         return new_text
     
-    def _generate_pattern(self, text):
+    def _generate_pattern(self, abbrs):
         '''
-        Given a string, returns an regex pattern to match that string. 
+        Given some strings, returns one regex pattern matching any of them.
         
-        'HTML' -> r'(?P<abbr>[H][T][M][L])' 
+        ['HTML', 'XHTML'] -> r'(?P<abbr>\b(?:XHTML|HTML)\b)'
         
-        Note: we force each char as a literal match (in brackets) as we don't 
-        know what they will be beforehand.
+        Note: longer strings go first so that an abbreviation is never cut
+        short by another one it starts with.
 
         '''
-        chars = list(text)
-        for i in range(len(chars)):
-            chars[i] = r'[%s]' % chars[i]
-        return r'(?P<abbr>\b%s\b)' % (r''.join(chars))
+        alternatives = sorted(abbrs, key=len, reverse=True)
+        return r'(?P<abbr>\b(?:%s)\b)' % '|'.join(map(re.escape, alternatives))
 
 
 class AbbrPattern(markdown.inlinepatterns.Pattern):
     """ Abbreviation inline pattern. """
 
-    def __init__(self, pattern, title):
+    def __init__(self, pattern, titles):
         markdown.inlinepatterns.Pattern.__init__(self, pattern)
-        self.title = title
+        self.titles = titles
 
     def handleMatch(self, m):
         abbr = etree.Element('abbr')
         abbr.text = m.group('abbr')
-        abbr.set('title', self.title)
+        abbr.set('title', self.titles[abbr.text])
         return abbr
 
 def makeExtension(configs=None):
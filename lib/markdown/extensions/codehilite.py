@@ -21,6 +21,11 @@ Dependencies:
 """
 
 import markdown
+import re
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import new as md5
 
 # --------------- CONSTANTS YOU MIGHT WANT TO MODIFY -----------------
 
@@ -29,6 +34,112 @@ try:
 except AttributeError:
     TAB_LENGTH = 4
 
+# Number of highlighted blocks kept in memory by HiliteCache
+MAX_CACHED_BLOCKS = 500
+
+# First line of a block naming its language: ":::lang" or a shebang
+LANG_RE = re.compile(r'''
+    (?:(?:::+)|(?P<shebang>[#]!))	# Shebang or 2 or more colons.
+    (?P<path>(?:/\w+)*[/ ])?        # Zero or 1 path
+    (?P<lang>[\w+-]*)               # The language
+    ''',  re.VERBOSE)
+
+# Cheap checks on the start of a block that names no language, tried before
+# asking pygments to guess (which imports and runs every lexer's analyser)
+LANG_SIGNATURES = [
+    (re.compile(r'<\?php'), 'php'),
+    (re.compile(r'<\?xml'), 'xml'),
+    (re.compile(r'<!DOCTYPE html|<html[\s>]', re.IGNORECASE), 'html'),
+    (re.compile(r'diff |Index: |--- .*\n\+\+\+ '), 'diff'),
+    (re.compile(r'>>> '), 'pycon'),
+    (re.compile(r'\$ '), 'console'),
+]
+
+
+# ------------------ Highlighted Block Cache ------------------------
+class HiliteCache:
+    """
+    Cache of highlighted html with least recently used eviction.
+
+    Misses can fall back to a shared second tier: any object with memcache
+    style `get(key)` and `set(key, value)` methods, such as the AppEngine
+    memcache module.
+
+        >>> cache = HiliteCache(max_entries=2)
+        >>> cache.set('a', 1); cache.set('b', 2); cache.get('a')
+        1
+        >>> cache.set('c', 3) # evicts 'b', the least recently used
+        >>> cache.get('b') is None
+        True
+
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_BLOCKS, backend=None,
+                 prefix='codehilite:'):
+        self.max_entries = max_entries
+        self.backend = backend
+        self.prefix = prefix
+        self.hits = self.misses = 0
+        self.clear()
+
+    def clear(self):
+        """ Empty the in-memory tier. """
+        # Entries are [prev, next, key, value] links of a circular list
+        # ordered from least to most recently used.
+        self.entries = {}
+        self.root = root = []
+        root[:] = [root, root, None, None]
+
+    def get(self, key):
+        """ Return the value stored for `key`, or None. """
+        link = self.entries.get(key)
+        if link is not None:
+            self._unlink(link)
+            self._append(link)
+            self.hits += 1
+            return link[3]
+
+        value = None
+        if self.backend is not None:
+            value = self.backend.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._store(key, value)
+        return value
+
+    def set(self, key, value):
+        """ Store `value` for `key` in every tier. """
+        self._store(key, value)
+        if self.backend is not None:
+            self.backend.set(self.prefix + key, value)
+
+    def _store(self, key, value):
+        link = self.entries.get(key)
+        if link is not None:
+            self._unlink(link)
+        elif len(self.entries) >= self.max_entries:
+            oldest = self.root[1]
+            self._unlink(oldest)
+            del self.entries[oldest[2]]
+        link = self.entries[key] = [None, None, key, value]
+        self._append(link)
+
+    def _unlink(self, link):
+        link[0][1] = link[1]
+        link[1][0] = link[0]
+
+    def _append(self, link):
+        last = self.root[0]
+        link[0] = last
+        link[1] = self.root
+        last[1] = self.root[0] = link
+
+
+# Highlighted blocks shared by every CodeHilite instance in the process
+cache = HiliteCache()
+
 
 # ------------------ The Main CodeHilite Class ----------------------
 class CodeHilite:
@@ -45,6 +156,11 @@ class CodeHilite:
 
     * css_class: Set class name of wrapper div ('codehilite' by default).
 
+    * default_lang: Language of blocks that do not name one. When not set,
+      the language is guessed.
+
+    * guess_langs: Only consider these languages when guessing.
+
     Low Level Usage:
         >>> code = CodeHilite()
         >>> code.src = 'some text' # String or anything with a .readline attr.
@@ -54,9 +170,12 @@ class CodeHilite:
     """
 
     def __init__(self, src=None, linenos=False, css_class="codehilite",
-                lang=None, style='default', noclasses=False):
+                lang=None, style='default', noclasses=False,
+                default_lang=None, guess_langs=None):
         self.src = src
         self.lang = lang
+        self.default_lang = default_lang
+        self.guess_langs = guess_langs
         self.linenos = linenos
         self.css_class = css_class
         self.style = style
@@ -80,9 +199,8 @@ class CodeHilite:
 
         try:
             from pygments import highlight
-            from pygments.lexers import get_lexer_by_name, guess_lexer, \
-                                        TextLexer
-            from pygments.formatters import HtmlFormatter
+            from pygments.lexers import get_cached_lexer_by_name
+            from pygments.formatters import HtmlFormatter, get_cached_formatter
         except ImportError:
             # just escape and pass through
             txt = self._escape(self.src)
@@ -93,18 +211,59 @@ class CodeHilite:
                         (self.css_class, txt)
             return txt
         else:
+            key = self._cache_key()
+            html = cache.get(key)
+            if html is not None:
+                return html
+
             try:
-                lexer = get_lexer_by_name(self.lang)
+                lexer = get_cached_lexer_by_name(self.lang)
             except ValueError:
-                try:
-                    lexer = guess_lexer(self.src)
-                except ValueError:
-                    lexer = TextLexer()
-            formatter = HtmlFormatter(linenos=self.linenos,
-                                      cssclass=self.css_class,
-                                      style=self.style,
-                                      noclasses=self.noclasses)
-            return highlight(self.src, lexer, formatter)
+                lexer = self._guessLexer()
+            formatter = get_cached_formatter(HtmlFormatter,
+                                             linenos=self.linenos,
+                                             cssclass=self.css_class,
+                                             style=self.style,
+                                             noclasses=self.noclasses)
+            html = highlight(self.src, lexer, formatter)
+            cache.set(key, html)
+            return html
+
+    def _cache_key(self):
+        """ Return the key of the highlighted block in the cache. """
+        src = self.src
+        if isinstance(src, unicode):
+            src = src.encode('utf-8')
+        options = repr((self.lang, self.style, self.linenos, self.noclasses,
+                        self.css_class, self.default_lang, self.guess_langs))
+        return '%s:%s' % (md5(src).hexdigest(), md5(options).hexdigest())
+
+    def _guessLexer(self):
+        """
+        Pick a lexer for a block that does not name its language: check
+        LANG_SIGNATURES, then guess among `guess_langs`, then use
+        `default_lang`. Only without both does every lexer get to guess.
+
+        """
+        from pygments.lexers import get_cached_lexer_by_name, guess_lexer, \
+                                    guess_lexer_among, TextLexer
+
+        for signature, lang in LANG_SIGNATURES:
+            if signature.match(self.src):
+                return get_cached_lexer_by_name(lang)
+
+        try:
+            if self.guess_langs:
+                return guess_lexer_among(self.guess_langs, self.src)
+            if not self.default_lang:
+                return guess_lexer(self.src)
+        except ValueError:
+            pass
+
+        try:
+            return get_cached_lexer_by_name(self.default_lang)
+        except ValueError:
+            return TextLexer()
 
     def _escape(self, txt):
         """ basic html escaping """
@@ -146,20 +305,13 @@ class CodeHilite:
 
         """
 
-        import re
-
         #split text into lines
         lines = self.src.split("\n")
         #pull first line to examine
         fl = lines.pop(0)
 
-        c = re.compile(r'''
-            (?:(?:::+)|(?P<shebang>[#]!))	# Shebang or 2 or more colons.
-            (?P<path>(?:/\w+)*[/ ])?        # Zero or 1 path
-            (?P<lang>[\w+-]*)               # The language
-            ''',  re.VERBOSE)
         # search first line for shebang
-        m = c.search(fl)
+        m = LANG_RE.search(fl)
         if m:
             # we have a match
             try:
@@ -180,6 +332,11 @@ class CodeHilite:
 
 
 
+def split_langs(langs):
+    """ Turn a space or comma separated string of languages into a list. """
+    return [lang for lang in re.split(r'[\s,]+', langs or '') if lang]
+
+
 # ------------------ The Markdown Extension -------------------------------
 class HiliteTreeprocessor(markdown.treeprocessors.Treeprocessor):
     """ Hilight source code in code blocks. """
@@ -194,7 +351,9 @@ class HiliteTreeprocessor(markdown.treeprocessors.Treeprocessor):
                             linenos=self.config['force_linenos'][0],
                             css_class=self.config['css_class'][0],
                             style=self.config['pygments_style'][0],
-                            noclasses=self.config['noclasses'][0])
+                            noclasses=self.config['noclasses'][0],
+                            default_lang=self.config['default_lang'][0],
+                            guess_langs=split_langs(self.config['guess_langs'][0]))
                 placeholder = self.markdown.htmlStash.store(code.hilite(),
                                                             safe=True)
                 # Clear codeblock in etree instance
@@ -215,7 +374,9 @@ class CodeHiliteExtension(markdown.Extension):
             'css_class' : ["codehilite",
                            "Set class name for wrapper <div> - Default: codehilite"],
             'pygments_style' : ['tango', 'Pygments HTML Formatter Style (Colorscheme) - Default: tango'],
-            'noclasses': [False, 'Use inline styles instead of CSS classes - Default false']
+            'noclasses': [False, 'Use inline styles instead of CSS classes - Default false'],
+            'default_lang': ['', 'Language of blocks that do not name one - Default: guess'],
+            'guess_langs': ['', 'Space separated languages considered when guessing - Default: all']
             }
 
         # Override defaults with user settings
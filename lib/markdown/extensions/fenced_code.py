@@ -62,7 +62,8 @@ Dependencies:
 """
 
 import markdown, re
-from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension
+from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension, \
+                                           split_langs
 
 # Global vars
 FENCED_BLOCK_RE = re.compile( \
@@ -110,32 +111,38 @@ class FencedBlockPreprocessor(markdown.preprocessors.Preprocessor):
             self.checked_for_codehilite = True
 
         text = "\n".join(lines)
-        while 1:
-            m = FENCED_BLOCK_RE.search(text)
-            if m:
-                lang = ''
-                if m.group('lang'):
-                    lang = LANG_TAG % m.group('lang')
-
-                # If config is not empty, then the codehighlite extension
-                # is enabled, so we call it to highlite the code
-                if self.codehilite_conf:
-                    highliter = CodeHilite(m.group('code'),
-                            linenos=self.codehilite_conf['force_linenos'][0],
-                            css_class=self.codehilite_conf['css_class'][0],
-                            style=self.codehilite_conf['pygments_style'][0],
-                            lang=(m.group('lang') if m.group('lang') else None),
-                            noclasses=self.codehilite_conf['noclasses'][0])
-
-                    code = highliter.hilite()
-                else:
-                    code = CODE_WRAP % (lang, self._escape(m.group('code')))
-
-                placeholder = self.markdown.htmlStash.store(code, safe=True)
-                text = '%s\n%s\n%s'% (text[:m.start()], placeholder, text[m.end():])
+        # Collect the pieces and join them once, rebuilding the whole text for
+        # every block made documents with many blocks quadratic.
+        parts = []
+        end = 0
+        for m in FENCED_BLOCK_RE.finditer(text):
+            lang = ''
+            if m.group('lang'):
+                lang = LANG_TAG % m.group('lang')
+
+            # If config is not empty, then the codehighlite extension
+            # is enabled, so we call it to highlite the code
+            if self.codehilite_conf:
+                highliter = CodeHilite(m.group('code'),
+                        linenos=self.codehilite_conf['force_linenos'][0],
+                        css_class=self.codehilite_conf['css_class'][0],
+                        style=self.codehilite_conf['pygments_style'][0],
+                        lang=(m.group('lang') if m.group('lang') else None),
+                        noclasses=self.codehilite_conf['noclasses'][0],
+                        default_lang=self.codehilite_conf['default_lang'][0],
+                        guess_langs=split_langs(
+                            self.codehilite_conf['guess_langs'][0]))
+
+                code = highliter.hilite()
             else:
-                break
-        return text.split("\n")
+                code = CODE_WRAP % (lang, self._escape(m.group('code')))
+
+            placeholder = self.markdown.htmlStash.store(code, safe=True)
+            parts.append(text[end:m.start()])
+            parts.append(placeholder)
+            end = m.end()
+        parts.append(text[end:])
+        return "\n".join(parts).split("\n")
 
     def _escape(self, txt):
         """ basic html escaping """
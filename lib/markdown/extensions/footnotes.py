@@ -30,6 +30,9 @@ FN_BACKLINK_TEXT = "zz1337820767766393qq"
 NBSP_PLACEHOLDER =  "qq3936677670287331zz"
 DEF_RE = re.compile(r'(\ ?\ ?\ ?)\[\^([^\]]*)\]:\s*(.*)')
 TABBED_RE = re.compile(r'((\t)|(    ))(.*)')
+PLACEHOLDER_RE = re.compile('%s|%s' % (FN_BACKLINK_TEXT, NBSP_PLACEHOLDER))
+PLACEHOLDER_ENTITIES = {FN_BACKLINK_TEXT: "&#8617;",
+                        NBSP_PLACEHOLDER: "&#160;"}
 
 class FootnoteExtension(markdown.Extension):
     """ Footnote Extension. """
@@ -75,26 +78,34 @@ class FootnoteExtension(markdown.Extension):
     def reset(self):
         """ Clear the footnotes on reset, and prepare for a distinct document. """
         self.footnotes = markdown.odict.OrderedDict()
+        self.numbers = {}
         self.unique_prefix += 1
 
     def findFootnotesPlaceholder(self, root):
-        """ Return ElementTree Element that contains Footnote placeholder. """
-        def finder(element):
-            for child in element:
-                if child.text:
-                    if child.text.find(self.getConfig("PLACE_MARKER")) > -1:
-                        return child, True
-                if child.tail:
-                    if child.tail.find(self.getConfig("PLACE_MARKER")) > -1:
-                        return (child, element), False
-                finder(child)
-            return None
-                
-        res = finder(root)
-        return res
+        """
+        Find the Footnote placeholder in the tree.
+
+        Return: A three item tuple of the element holding the placeholder,
+        its parent and its index in the parent, and whether the placeholder
+        is in the text (True) or the tail (False) of the element; or None.
+
+        """
+        marker = self.getConfig("PLACE_MARKER")
+        stack = [root]
+        while stack:
+            parent = stack.pop()
+            for i, child in enumerate(parent):
+                if child.text and marker in child.text:
+                    return child, parent, i, True
+                if child.tail and marker in child.tail:
+                    return child, parent, i, False
+            stack.extend(reversed(parent))
+        return None
 
     def setFootnote(self, id, text):
         """ Store a footnote for later retrieval. """
+        if id not in self.numbers:
+            self.numbers[id] = len(self.numbers) + 1
         self.footnotes[id] = text
 
     def makeFootnoteId(self, id):
@@ -130,7 +141,7 @@ class FootnoteExtension(markdown.Extension):
             backlink.set("href", "#" + self.makeFootnoteRefId(id))
             backlink.set("rev", "footnote")
             backlink.set("title", "Jump back to footnote %d in the text" % \
-                            (self.footnotes.index(id)+1))
+                            self.numbers[id])
             backlink.text = FN_BACKLINK_TEXT
 
             if li.getchildren():
@@ -151,13 +162,11 @@ class FootnotePreprocessor(markdown.preprocessors.Preprocessor):
         self.footnotes = footnotes
 
     def run(self, lines):
-        lines = self._handleFootnoteDefinitions(lines)
-        text = "\n".join(lines)
-        return text.split("\n")
+        return self._handleFootnoteDefinitions(lines)
 
     def _handleFootnoteDefinitions(self, lines):
         """
-        Recursively find all footnote definitions in lines.
+        Find all footnote definitions in lines in a single pass.
 
         Keywords:
 
@@ -166,61 +175,43 @@ class FootnotePreprocessor(markdown.preprocessors.Preprocessor):
         Return: A list of lines with footnote definitions removed.
         
         """
-        i, id, footnote = self._findFootnoteDefinition(lines)
-
-        if id :
-            plain = lines[:i]
-            detabbed, theRest = self.detectTabbed(lines[i+1:])
-            self.footnotes.setFootnote(id,
-                                       footnote + "\n"
-                                       + "\n".join(detabbed))
-            more_plain = self._handleFootnoteDefinitions(theRest)
-            return plain + [""] + more_plain
-        else :
-            return lines
-
-    def _findFootnoteDefinition(self, lines):
-        """
-        Find the parts of a footnote definition.
-
-        Keywords:
-
-        * lines: A list of lines of text.
+        plain = []
+        i = 0
+        while i < len(lines):
+            m = DEF_RE.match(lines[i])
+            if m and m.group(2):
+                detabbed, i = self.detectTabbed(lines, i + 1)
+                self.footnotes.setFootnote(m.group(2),
+                                           m.group(3) + "\n"
+                                           + "\n".join(detabbed))
+                plain.append("")
+            else:
+                plain.append(lines[i])
+                i += 1
+        return plain
 
-        Return: A three item tuple containing the index of the first line of a
-        footnote definition, the id of the definition and the body of the 
-        definition.
-        
-        """
-        counter = 0
-        for line in lines:
-            m = DEF_RE.match(line)
-            if m:
-                return counter, m.group(2), m.group(3)
-            counter += 1
-        return counter, None, None
-
-    def detectTabbed(self, lines):
+    def detectTabbed(self, lines, start=0):
         """ Find indented text and remove indent before further proccesing.
 
         Keyword arguments:
 
         * lines: an array of strings
+        * start: the index in lines to start from
 
-        Returns: a list of post processed items and the unused
-        remainder of the original list
+        Returns: a list of post processed items and the index of the
+        first unused line of the original list
 
         """
         items = []
-        item = -1
-        i = 0 # to keep track of where we are
+        i = start # to keep track of where we are
 
         def detab(line):
             match = TABBED_RE.match(line)
             if match:
                return match.group(4)
 
-        for line in lines:
+        while i < len(lines):
+            line = lines[i]
             if line.strip(): # Non-blank line
                 line = detab(line)
                 if line:
@@ -228,7 +219,7 @@ class FootnotePreprocessor(markdown.preprocessors.Preprocessor):
                     i += 1
                     continue
                 else:
-                    return items, lines[i:]
+                    return items, i
 
             else: # Blank line: _maybe_ we are done.
                 i += 1 # advance
@@ -249,7 +240,7 @@ class FootnotePreprocessor(markdown.preprocessors.Preprocessor):
         else:
             i += 1
 
-        return items, lines[i:]
+        return items, i
 
 
 class FootnotePattern(markdown.inlinepatterns.Pattern):
@@ -263,10 +254,12 @@ class FootnotePattern(markdown.inlinepatterns.Pattern):
         sup = etree.Element("sup")
         a = etree.SubElement(sup, "a")
         id = m.group(2)
+        if id not in self.footnotes.numbers:
+            return None
         sup.set('id', self.footnotes.makeFootnoteRefId(id))
         a.set('href', '#' + self.footnotes.makeFootnoteId(id))
         a.set('rel', 'footnote')
-        a.text = str(self.footnotes.footnotes.index(id) + 1)
+        a.text = str(self.footnotes.numbers[id])
         return sup
 
 
@@ -281,25 +274,27 @@ class FootnoteTreeprocessor(markdown.treeprocessors.Treeprocessor):
         if footnotesDiv:
             result = self.footnotes.findFootnotesPlaceholder(root)
             if result:
-                node, isText = result
+                child, parent, ind, isText = result
                 if isText:
-                    node.text = None
-                    node.getchildren().insert(0, footnotesDiv)
+                    parent.remove(child)
+                    parent.insert(ind, footnotesDiv)
                 else:
-                    child, element = node
-                    ind = element.getchildren().find(child)
-                    element.getchildren().insert(ind + 1, footnotesDiv)
+                    parent.insert(ind + 1, footnotesDiv)
                     child.tail = None
-                fnPlaceholder.parent.replaceChild(fnPlaceholder, footnotesDiv)
             else:
                 root.append(footnotesDiv)
 
 class FootnotePostprocessor(markdown.postprocessors.Postprocessor):
     """ Replace placeholders with html entities. """
 
+    def __init__ (self, footnotes):
+        self.footnotes = footnotes
+
     def run(self, text):
-        text = text.replace(FN_BACKLINK_TEXT, "&#8617;")
-        return text.replace(NBSP_PLACEHOLDER, "&#160;")
+        if not self.footnotes.footnotes:
+            return text
+        return PLACEHOLDER_RE.sub(lambda m: PLACEHOLDER_ENTITIES[m.group(0)],
+                                  text)
 
 def makeExtension(configs=[]):
     """ Return an instance of the FootnoteExtension """
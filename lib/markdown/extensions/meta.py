@@ -31,6 +31,11 @@ Make sure text without Meta Data still works (markdown < 1.6b returns a <p>).
     >>> md.Meta
     {}
 
+Meta-Data is reset between documents when converting in bulk.
+
+    >>> md.convert_many([u'Title: One\\n\\nFirst.', u'Second.'])
+    [(u'<p>First.</p>', {u'title': [u'One']}), (u'<p>Second.</p>', {})]
+
 Copyright 2007-2008 [Waylan Limberg](http://achinghead.com).
 
 Project website: <http://www.freewisdom.org/project/python-markdown/Meta-Data>
@@ -51,36 +56,65 @@ class MetaExtension (markdown.Extension):
 
     def extendMarkdown(self, md, md_globals):
         """ Add MetaPreprocessor to Markdown instance. """
+        md.registerExtension(self)
+        self.md = md
 
         md.preprocessors.add("meta", MetaPreprocessor(md), "_begin")
 
+    def reset(self):
+        """ Clear Meta-Data left over from a previous document. """
+        self.md.Meta = {}
+
 
 class MetaPreprocessor(markdown.preprocessors.Preprocessor):
     """ Get Meta-Data. """
 
     def run(self, lines):
         """ Parse Meta-Data and store in Markdown.Meta. """
-        meta = {}
-        key = None
-        while 1:
-            line = lines.pop(0)
-            if line.strip() == '':
-                break # blank line - done
-            m1 = META_RE.match(line)
-            if m1:
-                key = m1.group('key').lower().strip()
-                meta[key] = [m1.group('value').strip()]
-            else:
-                m2 = META_MORE_RE.match(line)
-                if m2 and key:
-                    # Add another line to existing key
-                    meta[key].append(m2.group('value').strip())
-                else:
-                    lines.insert(0, line)
-                    break # no meta data - done
+        meta, i = parseMeta(lines)
         self.markdown.Meta = meta
-        return lines
-        
+        return lines[i:]
+
+
+def parseMeta(lines):
+    """
+    Parse the Meta-Data at the start of a document.
+
+    Keyword arguments:
+
+    * lines: A list of lines of text.
+
+    Returns: A dictionary of Meta-Data and the index of the first line
+    after it (and after the blank line that ends it).
+
+    >>> parseMeta([u'Title: Test', u'Tags: a', u'    b', u'', u'Body.'])
+    ({u'tags': [u'a', u'b'], u'title': [u'Test']}, 4)
+    >>> parseMeta([u'Not meta data.', u''])
+    ({}, 0)
+
+    """
+    meta = {}
+    key = None
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.strip() == '':
+            i += 1
+            break # blank line - done
+        m1 = META_RE.match(line)
+        if m1:
+            key = m1.group('key').lower().strip()
+            meta[key] = [m1.group('value').strip()]
+        else:
+            m2 = META_MORE_RE.match(line)
+            if m2 and key:
+                # Add another line to existing key
+                meta[key].append(m2.group('value').strip())
+            else:
+                break # no meta data - done
+        i += 1
+    return meta, i
+
 
 def makeExtension(configs={}):
     return MetaExtension(configs=configs)
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+
+"""
+HTML Minify Extension for Python-Markdown
+=========================================
+
+Collapses insignificant whitespace in the output of Python-Markdown. Unlike
+the HTML Tidy extension it needs no external library, so it can run where
+libtidy is not available.
+
+Runs of whitespace in text and between tags become a single space, or a
+single newline when the run contained one, so the output keeps one block
+per line. The contents of ``<pre>``, ``<textarea>``, ``<script>`` and
+``<style>`` elements, and comments, are left alone.
+
+    >>> import markdown
+    >>> text = '''A   paragraph
+    ...     with *extra*   spaces.
+    ...
+    ...
+    ...     code   stays
+    ...         as is
+    ... '''
+    >>> markdown.markdown(text, ['minify'])
+    u'<p>A paragraph\\nwith <em>extra</em> spaces.</p>\\n<pre><code>code   stays\\n    as is\\n</code></pre>'
+
+With ``quote_attributes`` set, attribute values in raw HTML are normalized
+to use double quotes, as in the rest of the output:
+
+    >>> markdown.markdown("<div class=note   id='x'>\\n\\n</div>",
+    ...                   ['minify(quote_attributes=True)'])
+    u'<div class="note" id="x">\\n</div>'
+
+The minifier itself is the `minifier` module, which can be used on any HTML,
+such as rendered pages, without importing markdown.
+
+Dependencies:
+* [Python2.3+](http://python.org)
+* [Markdown 2.0+](http://www.freewisdom.org/projects/python-markdown/)
+
+"""
+
+import markdown
+from minifier import minify
+
+
+class MinifyExtension(markdown.Extension):
+    """ Minify Extension. """
+
+    def __init__(self, configs):
+        # set defaults
+        self.config = {
+                'quote_attributes' : [False,
+                    'Rewrite attribute values to use double quotes.']
+            }
+
+        for key, value in configs:
+            if isinstance(value, basestring):
+                value = value.lower() in ('true', 'yes', '1')
+            self.setConfig(key, value)
+
+    def extendMarkdown(self, md, md_globals):
+        """ Add MinifyPostprocessor after all other postprocessors. """
+        processor = MinifyPostprocessor(md)
+        processor.quote_attributes = self.getConfig('quote_attributes')
+        md.postprocessors.add('minify', processor, '_end')
+
+
+class MinifyPostprocessor(markdown.postprocessors.Postprocessor):
+    """ Collapse whitespace in the serialized document. """
+
+    quote_attributes = False
+
+    def run(self, text):
+        return minify(text, self.quote_attributes)
+
+
+def makeExtension(configs=[]):
+    return MinifyExtension(configs=configs)
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -22,23 +22,21 @@ class TableProcessor(markdown.blockprocessors.BlockProcessor):
     """ Process Tables. """
 
     def test(self, parent, block):
-        rows = block.split('\n')
+        # Only the header and separator lines are needed to decide.
+        rows = block.split('\n', 2)
         return (len(rows) > 2 and '|' in rows[0] and 
                 '|' in rows[1] and '-' in rows[1] and 
                 rows[1][0] in ['|', ':', '-'])
 
     def run(self, parent, blocks):
         """ Parse a table block and build table. """
-        block = blocks.pop(0).split('\n')
-        header = block[:2]
-        rows = block[2:]
+        rows = iter(blocks.pop(0).split('\n'))
+        header = rows.next()
         # Get format type (bordered by pipes or not)
-        border = False
-        if header[0].startswith('|'):
-            border = True
+        border = header.startswith('|')
         # Get alignment of columns
         align = []
-        for c in self._split_row(header[1], border):
+        for c in self._split_row(rows.next(), border):
             if c.startswith(':') and c.endswith(':'):
                 align.append('center')
             elif c.startswith(':'):
@@ -50,25 +48,23 @@ class TableProcessor(markdown.blockprocessors.BlockProcessor):
         # Build table
         table = etree.SubElement(parent, 'table')
         thead = etree.SubElement(table, 'thead')
-        self._build_row(header[0], thead, align, border)
+        self._build_row(header, thead, align, border, 'th')
         tbody = etree.SubElement(table, 'tbody')
         for row in rows:
-            self._build_row(row, tbody, align, border)
+            self._build_row(row, tbody, align, border, 'td')
 
-    def _build_row(self, row, parent, align, border):
+    def _build_row(self, row, parent, align, border, tag='td'):
         """ Given a row of text, build table cells. """
         tr = etree.SubElement(parent, 'tr')
-        tag = 'td'
-        if parent.tag == 'thead':
-            tag = 'th'
         cells = self._split_row(row, border)
         # We use align here rather than cells to ensure every row 
         # contains the same number of columns.
+        ncells = len(cells)
         for i, a in enumerate(align):
             c = etree.SubElement(tr, tag)
-            try:
+            if i < ncells:
                 c.text = cells[i].strip()
-            except IndexError:
+            else:
                 c.text = ""
             if a:
                 c.set('align', a)
@@ -7,17 +7,29 @@ Table of Contents Extension for Python-Markdown
 Dependencies:
 * [Markdown 2.0+](http://www.freewisdom.org/projects/python-markdown/)
 
+The headers are also kept as nested dicts on the Markdown instance, so the
+table of contents can be rendered elsewhere without parsing the html:
+
+    >>> md = markdown.Markdown(['toc'])
+    >>> html = md.convert('# One\\n\\n## Two\\n\\n# One')
+    >>> [(t['id'], [c['id'] for c in t['children']]) for t in md.toc_tokens]
+    [(u'one', [u'two']), (u'one_1', [])]
+
 """
 import markdown
 from markdown import etree
 import re
 
+HEADER_RE = re.compile("[Hh][123456]")
+SLUG_STRIP_RE = re.compile('[^\w\s-]')
+SLUG_HYPHENATE_RE = re.compile('[-\s]+')
+
 class TocTreeprocessor(markdown.treeprocessors.Treeprocessor):
-    # Iterator wrapper to get parent and child all at once
+    # Iterator wrapper to get parent, index of child and child all at once
     def iterparent(self, root):
         for parent in root.getiterator():
-            for child in parent:
-                yield parent, child
+            for index, child in enumerate(parent):
+                yield parent, index, child
 
     def run(self, doc):
         div = etree.Element("div")
@@ -30,17 +42,14 @@ class TocTreeprocessor(markdown.treeprocessors.Treeprocessor):
             header.attrib["class"] = "toctitle"
             header.text = self.config["title"][0]
 
-        level = 0
-        list_stack=[div]
-        header_rgx = re.compile("[Hh][123456]")
-
-        # Get a list of id attributes
-        used_ids = []
-        for c in doc.getiterator():
+        # Collect existing ids, headers and marker positions in one walk
+        used_ids = set()
+        if "id" in doc.attrib:
+            used_ids.add(doc.attrib["id"])
+        headers = []
+        for (p, i, c) in self.iterparent(doc):
             if "id" in c.attrib:
-                used_ids.append(c.attrib["id"])
-
-        for (p, c) in self.iterparent(doc):
+                used_ids.add(c.attrib["id"])
             if not c.text:
                 continue
 
@@ -51,58 +60,74 @@ class TocTreeprocessor(markdown.treeprocessors.Treeprocessor):
             # would causes an enless loop of placing a new TOC 
             # inside previously generated TOC.
 
-            if c.text.find(self.config["marker"][0]) > -1 and not header_rgx.match(c.tag):
-                for i in range(len(p)):
-                    if p[i] == c:
-                        p[i] = div
-                        break
-                    
-            if header_rgx.match(c.tag):
-                tag_level = int(c.tag[-1])
-                
-                while tag_level < level:
-                    list_stack.pop()
-                    level -= 1
-
-                if tag_level > level:
-                    newlist = etree.Element("ul")
-                    if last_li:
-                        last_li.append(newlist)
-                    else:
-                        list_stack[-1].append(newlist)
-                    list_stack.append(newlist)
-                    if level == 0:
-                        level = tag_level
-                    else:
-                        level += 1
-
-                # Do not override pre-existing ids 
-                if not "id" in c.attrib:
-                    id = self.config["slugify"][0](c.text)
-                    if id in used_ids:
-                        ctr = 1
-                        while "%s_%d" % (id, ctr) in used_ids:
-                            ctr += 1
-                        id = "%s_%d" % (id, ctr)
-                    used_ids.append(id)
-                    c.attrib["id"] = id
-                else:
-                    id = c.attrib["id"]
-
-                # List item link, to be inserted into the toc div
-                last_li = etree.Element("li")
-                link = etree.SubElement(last_li, "a")
-                link.text = c.text
-                link.attrib["href"] = '#' + id
-
-                if int(self.config["anchorlink"][0]):
-                    anchor = etree.SubElement(c, "a")
-                    anchor.text = c.text
-                    anchor.attrib["href"] = "#" + id
-                    anchor.attrib["class"] = "toclink"
-                    c.text = ""
+            if HEADER_RE.match(c.tag):
+                headers.append(c)
+            elif c.text.find(self.config["marker"][0]) > -1:
+                p[i] = div
 
-                list_stack[-1].append(last_li)
+        level = 0
+        list_stack = [div]
+        # Same nesting as list_stack, as dicts for Markdown.toc_tokens
+        token_stack = [[]]
+        last_token = None
+        # Next suffix to try for each id that was already taken
+        id_suffixes = {}
+
+        for c in headers:
+            tag_level = int(c.tag[-1])
+
+            while tag_level < level:
+                list_stack.pop()
+                token_stack.pop()
+                level -= 1
+
+            if tag_level > level:
+                newlist = etree.Element("ul")
+                if last_li:
+                    last_li.append(newlist)
+                    token_stack.append(last_token["children"])
+                else:
+                    list_stack[-1].append(newlist)
+                    token_stack.append(token_stack[-1])
+                list_stack.append(newlist)
+                if level == 0:
+                    level = tag_level
+                else:
+                    level += 1
+
+            # Do not override pre-existing ids 
+            if not "id" in c.attrib:
+                id = self.config["slugify"][0](c.text)
+                if id in used_ids:
+                    ctr = id_suffixes.get(id, 1)
+                    while "%s_%d" % (id, ctr) in used_ids:
+                        ctr += 1
+                    id_suffixes[id] = ctr + 1
+                    id = "%s_%d" % (id, ctr)
+                used_ids.add(id)
+                c.attrib["id"] = id
+            else:
+                id = c.attrib["id"]
+
+            # List item link, to be inserted into the toc div
+            last_li = etree.Element("li")
+            link = etree.SubElement(last_li, "a")
+            link.text = c.text
+            link.attrib["href"] = '#' + id
+            last_token = {"level": tag_level, "id": id, "name": c.text,
+                          "children": []}
+
+            if int(self.config["anchorlink"][0]):
+                anchor = etree.SubElement(c, "a")
+                anchor.text = c.text
+                anchor.attrib["href"] = "#" + id
+                anchor.attrib["class"] = "toclink"
+                c.text = ""
+
+            list_stack[-1].append(last_li)
+            token_stack[-1].append(last_token)
+
+        self.markdown.toc_tokens = token_stack[0]
 
 class TocExtension(markdown.Extension):
     def __init__(self, configs):
@@ -127,13 +152,23 @@ class TocExtension(markdown.Extension):
         """ Slugify a string, to make it URL friendly. """
         import unicodedata
         value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore')
-        value = unicode(re.sub('[^\w\s-]', '', value).strip().lower())
-        return re.sub('[-\s]+','-',value)
+        value = unicode(SLUG_STRIP_RE.sub('', value).strip().lower())
+        return SLUG_HYPHENATE_RE.sub('-', value)
 
     def extendMarkdown(self, md, md_globals):
+        md.registerExtension(self)
+        self.md = md
         tocext = TocTreeprocessor(md)
         tocext.config = self.config
         md.treeprocessors.add("toc", tocext, "_begin")
+
+    def reset(self):
+        """ Forget the headers of the previous document. """
+        self.md.toc_tokens = []
 	
 def makeExtension(configs={}):
     return TocExtension(configs=configs)
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -81,9 +81,11 @@ Dependencies:
 import markdown
 import re
 
+LABEL_SPACES_RE = re.compile(r'([ ]+_)|(_[ ]+)|([ ]+)')
+
 def build_url(label, base, end):
     """ Build a url from the label, a base, and an end. """
-    clean_label = re.sub(r'([ ]+_)|(_[ ]+)|([ ]+)', '_', label)
+    clean_label = LABEL_SPACES_RE.sub('_', label)
     return '%s%s%s'% (base, clean_label, end)
 
 
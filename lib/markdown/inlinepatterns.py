@@ -126,7 +126,8 @@ class Pattern:
 
         """
         self.pattern = pattern
-        self.compiled_re = re.compile("^(.*?)%s(.*?)$" % pattern, re.DOTALL)
+        self.compiled_re = markdown.compileRegExp("^(.*?)%s(.*?)$" % pattern,
+                                                  re.DOTALL)
 
         # Api for Markdown to pass safe_mode into instance
         self.safe_mode = False
@@ -28,9 +28,9 @@ class OrderedDict(dict):
                                for key, value in self.iteritems()])
 
     def __setitem__(self, key, value):
-        super(OrderedDict, self).__setitem__(key, value)
-        if key not in self.keyOrder:
+        if key not in self:
             self.keyOrder.append(key)
+        super(OrderedDict, self).__setitem__(key, value)
 
     def __delitem__(self, key):
         super(OrderedDict, self).__delitem__(key)
@@ -79,7 +79,7 @@ class OrderedDict(dict):
             self.__setitem__(k, v)
 
     def setdefault(self, key, default):
-        if key not in self.keyOrder:
+        if key not in self:
             self.keyOrder.append(key)
         return super(OrderedDict, self).setdefault(key, default)
 
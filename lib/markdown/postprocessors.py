@@ -9,8 +9,14 @@ processing.
 """
 
 
+import re
 import markdown
 
+# A placeholder left by HtmlStash, with the paragraph tags around it if any
+RAW_HTML_RE = re.compile(r'(<p>)?%s(\d+)%s(</p>)?' %
+                         (re.escape(markdown.preprocessors.HTML_PLACEHOLDER_PREFIX),
+                          re.escape(markdown.ETX)))
+
 class Processor:
     def __init__(self, markdown_instance=None):
         if markdown_instance:
@@ -42,22 +48,30 @@ class RawHtmlPostprocessor(Postprocessor):
 
     def run(self, text):
         """ Iterate over html stash and restore "safe" html. """
-        for i in range(self.markdown.htmlStash.html_counter):
-            html, safe  = self.markdown.htmlStash.rawHtmlBlocks[i]
-            if self.markdown.safeMode and not safe:
-                if str(self.markdown.safeMode).lower() == 'escape':
-                    html = self.escape(html)
-                elif str(self.markdown.safeMode).lower() == 'remove':
-                    html = ''
-                else:
-                    html = markdown.HTML_REMOVED_TEXT
-            if safe or not self.markdown.safeMode:
-                text = text.replace("<p>%s</p>" % 
-                            (markdown.preprocessors.HTML_PLACEHOLDER % i),
-                            html + "\n")
-            text =  text.replace(markdown.preprocessors.HTML_PLACEHOLDER % i, 
-                                 html)
-        return text
+        if not self.markdown.htmlStash.html_counter:
+            return text
+        # Splice every block in during a single pass over the document
+        return RAW_HTML_RE.sub(self.restore, text)
+
+    def restore(self, m):
+        """ Return the stashed html for the placeholder matched by m. """
+        i = int(m.group(2))
+        if i >= self.markdown.htmlStash.html_counter:
+            return m.group(0)
+        html, safe  = self.markdown.htmlStash.rawHtmlBlocks[i]
+        if self.markdown.safeMode and not safe:
+            if str(self.markdown.safeMode).lower() == 'escape':
+                html = self.escape(html)
+            elif str(self.markdown.safeMode).lower() == 'remove':
+                html = ''
+            else:
+                html = markdown.HTML_REMOVED_TEXT
+        if markdown.preprocessors.HTML_PLACEHOLDER_PREFIX in html:
+            # a block stashed inside another one
+            html = RAW_HTML_RE.sub(self.restore, html)
+        if m.group(1) and m.group(3) and (safe or not self.markdown.safeMode):
+            return html + "\n"
+        return (m.group(1) or '') + html + (m.group(3) or '')
 
     def escape(self, html):
         """ Basic html escaping """
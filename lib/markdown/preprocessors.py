@@ -87,6 +87,7 @@ class HtmlBlockPreprocessor(Preprocessor):
     left_tag_pattern = r'^\<(?P<tag>[^> ]+)(?P<attrs>(%s)*)\s*\/?\>?' % attrs_pattern
     attrs_re = re.compile(attrs_pattern, re.VERBOSE)
     left_tag_re = re.compile(left_tag_pattern, re.VERBOSE)
+    markdown_attr_re = re.compile(r'\smarkdown(=[\'"]?[^> ]*[\'"]?)?')
     markdown_in_raw = False
 
     def _get_left_tag(self, block):
@@ -141,17 +142,20 @@ class HtmlBlockPreprocessor(Preprocessor):
     def run(self, lines):
         text = "\n".join(lines)
         new_blocks = []
-        text = text.split("\n\n")
+        # Blocks are consumed from the end of a reversed list, so taking the
+        # next block and pushing back the remainder of a split one are both
+        # O(1) and the whole document is handled in a single linear pass.
+        blocks = text.split("\n\n")
+        blocks.reverse()
         items = []
         left_tag = ''
         right_tag = ''
         in_tag = False # flag
         
-        while text:
-            block = text[0]
+        while blocks:
+            block = blocks.pop()
             if block.startswith("\n"):
                 block = block[1:]
-            text = text[1:]
 
             if block.startswith("\n"):
                 block = block[1:]
@@ -173,7 +177,7 @@ class HtmlBlockPreprocessor(Preprocessor):
                     
                     if data_index < len(block) \
                         and markdown.isBlockLevel(left_tag): 
-                        text.insert(0, block[data_index:])
+                        blocks.append(block[data_index:])
                         block = block[:data_index]
 
                     if not (markdown.isBlockLevel(left_tag) \
@@ -188,8 +192,7 @@ class HtmlBlockPreprocessor(Preprocessor):
                     if block.rstrip().endswith(">") \
                         and self._equal_tags(left_tag, right_tag):
                         if self.markdown_in_raw and 'markdown' in attrs.keys():
-                            start = re.sub(r'\smarkdown(=[\'"]?[^> ]*[\'"]?)?', 
-                                           '', block[:left_index])
+                            start = self.markdown_attr_re.sub('', block[:left_index])
                             end = block[-len(right_tag)-2:]
                             block = block[left_index:-len(right_tag)-2]
                             new_blocks.append(
@@ -227,8 +230,7 @@ class HtmlBlockPreprocessor(Preprocessor):
                     # if find closing tag
                     in_tag = False
                     if self.markdown_in_raw and 'markdown' in attrs.keys():
-                        start = re.sub(r'\smarkdown(=[\'"]?[^> ]*[\'"]?)?', 
-                                       '', items[0][:left_index])
+                        start = self.markdown_attr_re.sub('', items[0][:left_index])
                         items[0] = items[0][left_index:]
                         end = items[-1][-len(right_tag)-2:]
                         items[-1] = items[-1][:-len(right_tag)-2]
@@ -244,8 +246,7 @@ class HtmlBlockPreprocessor(Preprocessor):
 
         if items:
             if self.markdown_in_raw and 'markdown' in attrs.keys():
-                start = re.sub(r'\smarkdown(=[\'"]?[^> ]*[\'"]?)?', 
-                               '', items[0][:left_index])
+                start = self.markdown_attr_re.sub('', items[0][:left_index])
                 items[0] = items[0][left_index:]
                 end = items[-1][-len(right_tag)-2:]
                 items[-1] = items[-1][:-len(right_tag)-2]
@@ -1,5 +1,4 @@
 import markdown
-import re
 
 def isString(s):
     """ Check if it's string """
@@ -41,7 +40,8 @@ class InlineProcessor(Treeprocessor):
         self.__placeholder_suffix = markdown.ETX
         self.__placeholder_length = 4 + len(self.__placeholder_prefix) \
                                       + len(self.__placeholder_suffix)
-        self.__placeholder_re = re.compile(markdown.INLINE_PLACEHOLDER % r'([0-9]{4})')
+        self.__placeholder_re = markdown.compileRegExp(
+                markdown.INLINE_PLACEHOLDER % r'([0-9]{4})')
         self.markdown = md
 
     def __makePlaceholder(self, type):
@@ -88,12 +88,21 @@ class InlineProcessor(Treeprocessor):
 
         """
         if not isinstance(data, markdown.AtomicString):
+            patterns = self.__patterns
             startIndex = 0
-            while patternIndex < len(self.markdown.inlinePatterns):
-                data, matched, startIndex = self.__applyPattern(
-                    self.markdown.inlinePatterns.value_for_index(patternIndex),
-                    data, patternIndex, startIndex)
-                if not matched:
+            while patternIndex < len(patterns):
+                pattern = patterns[patternIndex]
+                # Most text matches few patterns, so test before doing the
+                # bookkeeping in __applyPattern.
+                if startIndex:
+                    match = pattern.getCompiledRegExp().match(data[startIndex:])
+                else:
+                    match = pattern.getCompiledRegExp().match(data)
+                if match:
+                    data, matched, startIndex = self.__applyPattern(
+                        pattern, data, patternIndex, startIndex, match)
+                else:
+                    startIndex = 0
                     patternIndex += 1
         return data
 
@@ -195,7 +204,8 @@ class InlineProcessor(Treeprocessor):
 
         return result
 
-    def __applyPattern(self, pattern, data, patternIndex, startIndex=0):
+    def __applyPattern(self, pattern, data, patternIndex, startIndex=0,
+                       match=None):
         """
         Check if the line fits the pattern, create the necessary
         elements, add it to stashed_nodes.
@@ -206,11 +216,13 @@ class InlineProcessor(Treeprocessor):
         * pattern: the pattern to be checked
         * patternIndex: index of current pattern
         * startIndex: string index, from which we starting search
+        * match: the result of matching the pattern, if already known
 
         Returns: String with placeholders instead of ElementTree elements.
 
         """
-        match = pattern.getCompiledRegExp().match(data[startIndex:])
+        if match is None:
+            match = pattern.getCompiledRegExp().match(data[startIndex:])
         leftData = data[:startIndex]
 
         if not match:
@@ -257,6 +269,7 @@ class InlineProcessor(Treeprocessor):
 
         """
         self.stashed_nodes = {}
+        self.__patterns = self.markdown.inlinePatterns.values()
 
         stack = [tree]
 
@@ -0,0 +1,74 @@
+"""Collapse insignificant whitespace in HTML
+
+Runs of whitespace in text and between tags become a single space, or a
+single newline when the run contained one, so the output keeps one block
+per line. The contents of <pre>, <textarea>, <script> and <style> elements,
+and comments, are left alone. Has no dependencies, so handlers can minify
+pages without importing markdown
+
+>>> minify(u'<ul>\\n  <li>One</li>\\n  <li title="a  b"\\n      >Two</li>\\n</ul>\\n')
+u'<ul>\\n<li>One</li>\\n<li title="a  b" >Two</li>\\n</ul>'
+>>> minify("<div class=note   id='x'>\\n\\n</div>", quote_attributes=True)
+'<div class="note" id="x">\\n</div>'
+"""
+import re
+
+# Elements and comments copied through verbatim, and all other tags
+TOKEN_RE = re.compile(r'<!--.*?-->'
+                      r'|<(pre|textarea|script|style)\b.*?</\1\s*>'
+                      r'|<[^>]*>', re.DOTALL | re.IGNORECASE)
+NEWLINE_SPACE_RE = re.compile(r'[ \t\r\f\v]*\n\s*')
+SPACE_RE = re.compile(r'[ \t\r\f\v]{2,}|[\t\r\f\v]')
+TAG_SPACE_RE = re.compile(r'''("[^"]*"|'[^']*')|\s+''')
+ATTRIBUTE_RE = re.compile(r'''\s+([^\s=>/]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+))?''')
+
+
+def collapse(text):
+    """ Collapse a run of whitespace to a newline if it had one, else a space. """
+    return SPACE_RE.sub(' ', NEWLINE_SPACE_RE.sub('\n', text))
+
+def collapse_tag(tag):
+    """ Collapse whitespace between the attributes of a tag, not inside them. """
+    if '\n' in tag or '  ' in tag or '\t' in tag:
+        return TAG_SPACE_RE.sub(lambda m: m.group(1) or ' ', tag)
+    return tag
+
+def quote(m):
+    """ Rewrite one attribute of a tag with its value in double quotes. """
+    name, value = m.groups()
+    if value is None:
+        return ' ' + name
+    if value[0] in '"\'':
+        value = value[1:-1]
+    return ' %s="%s"' % (name, value.replace('"', '&quot;'))
+
+def minify(html, quote_attributes=False):
+    """
+    Return html with insignificant whitespace collapsed.
+
+    Keyword arguments:
+
+    * html: A string of HTML.
+    * quote_attributes: Also rewrite every attribute value to be double
+      quoted, dropping extra whitespace between attributes.
+
+    """
+    parts = []
+    pos = 0
+    for m in TOKEN_RE.finditer(html):
+        if m.start() > pos:
+            parts.append(collapse(html[pos:m.start()]))
+        tag = m.group(0)
+        if m.group(1) is None and not tag.startswith('<!'):
+            if quote_attributes:
+                tag = ATTRIBUTE_RE.sub(quote, tag)
+            else:
+                tag = collapse_tag(tag)
+        parts.append(tag)
+        pos = m.end()
+    parts.append(collapse(html[pos:]))
+    return html[:0].join(parts).strip()
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
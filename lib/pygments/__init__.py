@@ -33,7 +33,7 @@ __all__ = ['lex', 'format', 'highlight']
 
 import sys, os
 
-from pygments.util import StringIO, BytesIO
+from pygments.util import ChunkWriter
 
 
 def lex(code, lexer):
@@ -55,15 +55,17 @@ def format(tokens, formatter, outfile=None):
     Format a tokenlist ``tokens`` with the formatter ``formatter``.
 
     If ``outfile`` is given and a valid file object (an object
-    with a ``write`` method), the result will be written to it, otherwise
-    it is returned as a string.
+    with a ``write`` method), the result will be written to it. If it
+    is a list, the result is appended to it in chunks as the formatter
+    produces them. Otherwise it is returned as a string.
     """
     try:
-        if not outfile:
-            #print formatter, 'using', formatter.encoding
-            realoutfile = formatter.encoding and BytesIO() or StringIO()
-            formatter.format(tokens, realoutfile)
-            return realoutfile.getvalue()
+        if isinstance(outfile, list):
+            formatter.format(tokens, ChunkWriter(outfile))
+        elif not outfile:
+            chunks = []
+            formatter.format(tokens, ChunkWriter(chunks))
+            return ''.join(chunks)
         else:
             formatter.format(tokens, outfile)
     except TypeError, err:
@@ -79,8 +81,9 @@ def highlight(code, lexer, formatter, outfile=None):
     Lex ``code`` with ``lexer`` and format it with the formatter ``formatter``.
 
     If ``outfile`` is given and a valid file object (an object
-    with a ``write`` method), the result will be written to it, otherwise
-    it is returned as a string.
+    with a ``write`` method), the result will be written to it. If it
+    is a list, the result is appended to it in chunks as the formatter
+    produces them. Otherwise it is returned as a string.
     """
     return format(lex(code, lexer), formatter, outfile)
 
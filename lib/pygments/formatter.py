@@ -13,6 +13,7 @@ import codecs
 
 from pygments.util import get_bool_opt
 from pygments.styles import get_style_by_name
+from pygments.token import Token
 
 __all__ = ['Formatter']
 
@@ -23,6 +24,36 @@ def _lookup_style(style):
     return style
 
 
+class TokenTable(dict):
+    """
+    Maps token types to a value computed once per type by ``resolve``,
+    e.g. the markup of the nearest parent type that has a style.
+
+    All token types that exist when the table is created are resolved
+    right away; subtypes made later (lexers can create them at any time)
+    are added by `add` the first time they are seen, so formatters need
+    a single dict lookup per token::
+
+        try:
+            value = table[ttype]
+        except KeyError:
+            value = table.add(ttype)
+    """
+
+    def __init__(self, resolve):
+        dict.__init__(self)
+        self.resolve = resolve
+        stack = [Token]
+        while stack:
+            ttype = stack.pop()
+            self.add(ttype)
+            stack.extend(ttype.subtypes)
+
+    def add(self, ttype):
+        value = self[ttype] = self.resolve(ttype)
+        return value
+
+
 class Formatter(object):
     """
     Converts a token stream to text.
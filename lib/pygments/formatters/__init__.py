@@ -21,7 +21,12 @@ for fcls in FORMATTERS:
 del fcls
 
 __all__ = ['get_formatter_by_name', 'get_formatter_for_filename',
-           'get_all_formatters'] + [cls.__name__ for cls in FORMATTERS]
+           'get_all_formatters', 'get_cached_formatter'] + \
+          [cls.__name__ for cls in FORMATTERS]
+
+#: maximum number of formatter instances kept by `get_cached_formatter`
+MAX_CACHED_FORMATTERS = 100
+_instance_cache = {}
 
 
 _formatter_alias_cache = {}
@@ -60,6 +65,28 @@ def get_formatter_for_filename(fn, **options):
     raise ClassNotFound("No formatter found for file name %r" % fn)
 
 
+def get_cached_formatter(cls, **options):
+    """
+    Get an instance of the formatter class `cls` for the given options,
+    reusing the instance of an earlier call with the same class and options.
+
+    Formatting does not change a formatter, so instances can be shared, but
+    the returned formatter must not be modified.  Calls with unhashable
+    option values (e.g. a list for ``hl_lines``) always get a new instance.
+    """
+    try:
+        key = (cls, tuple(sorted(options.iteritems())))
+        return _instance_cache[key]
+    except KeyError:
+        pass
+    except TypeError:
+        return cls(**options)
+    if len(_instance_cache) >= MAX_CACHED_FORMATTERS:
+        _instance_cache.clear()
+    formatter = _instance_cache[key] = cls(**options)
+    return formatter
+
+
 def get_all_formatters():
     """Return a generator for all formatters."""
     for formatter in FORMATTERS:
@@ -8,7 +8,7 @@
     :copyright: Copyright 2006-2009 by the Pygments team, see AUTHORS.
     :license: BSD, see LICENSE for details.
 """
-import sys, os
+import sys, os, re
 import StringIO
 
 try:
@@ -16,7 +16,7 @@ try:
 except NameError:
     from sets import Set as set
 
-from pygments.formatter import Formatter
+from pygments.formatter import Formatter, TokenTable
 from pygments.token import Token, Text, STANDARD_TYPES
 from pygments.util import get_bool_opt, get_int_opt, get_list_opt, bytes
 
@@ -24,13 +24,27 @@ from pygments.util import get_bool_opt, get_int_opt, get_list_opt, bytes
 __all__ = ['HtmlFormatter']
 
 
+_escape_html_table = {
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#39;',
+}
+
+_escape_html_re = re.compile('[&<>"\']')
+
+
+def _escape_html_char(match):
+    return _escape_html_table[match.group()]
+
+
 def escape_html(text):
     """Escape &, <, > as well as single and double quotes for HTML."""
-    return text.replace('&', '&amp;').  \
-                replace('<', '&lt;').   \
-                replace('>', '&gt;').   \
-                replace('"', '&quot;'). \
-                replace("'", '&#39;')
+    # most tokens have nothing to escape, so look before substituting
+    if _escape_html_re.search(text) is None:
+        return text
+    return _escape_html_re.sub(_escape_html_char, text)
 
 
 def get_random_id():
@@ -45,6 +59,17 @@ def get_random_id():
     return sha('%s|%s' % (random(), time())).hexdigest()
 
 
+#: (ttype2class, class2style) tables for each (style, classprefix) pair
+_stylesheet_cache = {}
+
+#: TokenTables of css classes for each classprefix
+_class_tables = {}
+
+#: TokenTables of the <span> opening a token for each (style, classprefix,
+#: noclasses) triple
+_span_tables = {}
+
+
 def _get_ttype_class(ttype):
     fname = STANDARD_TYPES.get(ttype)
     if fname:
@@ -374,19 +399,61 @@ class HtmlFormatter(Formatter):
             except ValueError:
                 pass
 
-        self._class_cache = {}
+        self._class_cache = self._create_class_table()
         self._create_stylesheet()
+        self._span_cache = self._create_span_table()
 
     def _get_css_class(self, ttype):
         """Return the css class of this token type prefixed with
         the classprefix option."""
-        if ttype in self._class_cache:
+        try:
             return self._class_cache[ttype]
-        return self.classprefix + _get_ttype_class(ttype)
+        except KeyError:
+            return self._class_cache.add(ttype)
+
+    def _create_class_table(self):
+        cp = self.classprefix
+        if cp not in _class_tables:
+            _class_tables[cp] = TokenTable(
+                lambda ttype: cp + _get_ttype_class(ttype))
+        return _class_tables[cp]
+
+    def _create_span_table(self):
+        # the opening tag for each token type, with its own class, or with
+        # the style of the nearest styled parent type for noclasses
+        key = (self.style, self.classprefix, self.noclasses)
+        if key in _span_tables:
+            return _span_tables[key]
+        if self.noclasses:
+            t2c = self.ttype2class
+            c2s = self.class2style
+            def resolve(ttype):
+                cclass = t2c.get(ttype)
+                while cclass is None:
+                    ttype = ttype.parent
+                    cclass = t2c.get(ttype)
+                return cclass and '<span style="%s">' % c2s[cclass][0] or ''
+        else:
+            classes = self._class_cache
+            def resolve(ttype):
+                try:
+                    cls = classes[ttype]
+                except KeyError:
+                    cls = classes.add(ttype)
+                return cls and '<span class="%s">' % cls or ''
+        table = _span_tables[key] = TokenTable(resolve)
+        return table
 
     def _create_stylesheet(self):
+        # the tables only depend on the style and the class prefix, and are
+        # never modified, so formatters using the same ones share them
+        key = (self.style, self.classprefix)
+        if key in _stylesheet_cache:
+            self.ttype2class, self.class2style = _stylesheet_cache[key]
+            return
         t2c = self.ttype2class = {Token: ''}
         c2s = self.class2style = {}
+        _stylesheet_cache[key] = (t2c, c2s)
         cp = self.classprefix
         for ttype, ndef in self.style:
             name = cp + _get_ttype_class(ttype)
@@ -600,55 +667,60 @@ class HtmlFormatter(Formatter):
         Just format the tokens, without any wrapping tags.
         Yield individual lines.
         """
-        nocls = self.noclasses
         lsep = self.lineseparator
-        # for <span style=""> lookup only
-        getcls = self.ttype2class.get
-        c2s = self.class2style
+        spans = self._span_cache
+        # escape_html, inlined as it is called for every token
+        search = _escape_html_re.search
+        sub = _escape_html_re.sub
 
+        # the pieces of the current line, joined once it is complete
         lspan = ''
-        line = ''
+        line = []
         for ttype, value in tokensource:
-            if nocls:
-                cclass = getcls(ttype)
-                while cclass is None:
-                    ttype = ttype.parent
-                    cclass = getcls(ttype)
-                cspan = cclass and '<span style="%s">' % c2s[cclass][0] or ''
-            else:
-                cls = self._get_css_class(ttype)
-                cspan = cls and '<span class="%s">' % cls or ''
+            try:
+                cspan = spans[ttype]
+            except KeyError:
+                cspan = spans.add(ttype)
+            cend = cspan and '</span>'
 
-            parts = escape_html(value).split('\n')
+            if search(value) is not None:
+                value = sub(_escape_html_char, value)
 
             # for all but the last line
-            for part in parts[:-1]:
-                if line:
-                    if lspan != cspan:
-                        line += (lspan and '</span>') + cspan + part + \
-                                (cspan and '</span>') + lsep
-                    else: # both are the same
-                        line += part + (lspan and '</span>') + lsep
-                    yield 1, line
-                    line = ''
-                elif part:
-                    yield 1, cspan + part + (cspan and '</span>') + lsep
-                else:
-                    yield 1, lsep
+            if '\n' in value:
+                parts = value.split('\n')
+                value = parts.pop()
+                for part in parts:
+                    if line:
+                        if not part:
+                            # don't open an empty span just to close it
+                            line.append(lspan and '</span>')
+                        elif lspan != cspan:
+                            line.extend((lspan and '</span>', cspan, part, cend))
+                        else: # both are the same
+                            line.extend((part, cend))
+                        line.append(lsep)
+                        yield 1, ''.join(line)
+                        line = []
+                    elif part:
+                        yield 1, cspan + part + cend + lsep
+                    else:
+                        yield 1, lsep
             # for the last line
-            if line and parts[-1]:
-                if lspan != cspan:
-                    line += (lspan and '</span>') + cspan + parts[-1]
-                    lspan = cspan
-                else:
-                    line += parts[-1]
-            elif parts[-1]:
-                line = cspan + parts[-1]
-                lspan = cspan
-            # else we neither have to open a new span nor set lspan
+            if not value:
+                # we neither have to open a new span nor set lspan
+                continue
+            if not line:
+                line = [cspan, value]
+            elif lspan != cspan:
+                line.extend((lspan and '</span>', cspan, value))
+            else:
+                line.append(value)
+            lspan = cspan
 
         if line:
-            yield 1, line + (lspan and '</span>') + lsep
+            line.extend((lspan and '</span>', lsep))
+            yield 1, ''.join(line)
 
     def _highlight_lines(self, tokensource):
         """
@@ -9,7 +9,7 @@
     :license: BSD, see LICENSE for details.
 """
 
-from pygments.formatter import Formatter
+from pygments.formatter import Formatter, TokenTable
 from pygments.token import Token, STANDARD_TYPES
 from pygments.util import get_bool_opt, get_int_opt, StringIO
 
@@ -111,6 +111,19 @@ def _get_ttype_name(ttype):
     return fname + aname
 
 
+def _get_ttype_styleval(ttype):
+    styles = []
+    while ttype is not Token:
+        styles.append(_get_ttype_name(ttype))
+        ttype = ttype.parent
+    return '+'.join(reversed(styles))
+
+
+#: The names of a token type and all its parents, joined for the \PY command.
+#: They do not depend on the style: unknown names are ignored by the macros.
+_stylevals = TokenTable(_get_ttype_styleval)
+
+
 class LatexFormatter(Formatter):
     r"""
     Format tokens as LaTeX code. This needs the `fancyvrb` and `color`
@@ -253,7 +266,6 @@ class LatexFormatter(Formatter):
 
     def format_unencoded(self, tokensource, outfile):
         # TODO: add support for background colors
-        t2n = self.ttype2name
         cp = self.commandprefix
 
         if self.full:
@@ -272,15 +284,10 @@ class LatexFormatter(Formatter):
 
         for ttype, value in tokensource:
             value = escape_tex(value, self.commandprefix)
-            styles = []
-            while ttype is not Token:
-                try:
-                    styles.append(t2n[ttype])
-                except KeyError:
-                    # not in current style
-                    styles.append(_get_ttype_name(ttype))
-                ttype = ttype.parent
-            styleval = '+'.join(reversed(styles))
+            try:
+                styleval = _stylevals[ttype]
+            except KeyError:
+                styleval = _stylevals.add(ttype)
             if styleval:
                 spl = value.split('\n')
                 for line in spl[:-1]:
@@ -9,7 +9,7 @@
     :license: BSD, see LICENSE for details.
 """
 
-from pygments.formatter import Formatter
+from pygments.formatter import Formatter, TokenTable
 from pygments.token import Keyword, Name, Comment, String, Error, \
      Number, Operator, Generic, Token, Whitespace
 from pygments.console import ansiformat
@@ -81,6 +81,16 @@ class TerminalFormatter(Formatter):
         self.darkbg = get_choice_opt(options, 'bg',
                                      ['light', 'dark'], 'light') == 'dark'
         self.colorscheme = options.get('colorscheme', None) or TERMINAL_COLORS
+        self._colors = TokenTable(self._get_color)
+
+    def _get_color(self, ttype):
+        color = self.colorscheme.get(ttype)
+        while color is None:
+            ttype = ttype.parent
+            color = self.colorscheme.get(ttype)
+        if color:
+            return color[self.darkbg]
+        return None
 
     def format(self, tokensource, outfile):
         # hack: if the output is a terminal and has an encoding set,
@@ -91,13 +101,13 @@ class TerminalFormatter(Formatter):
         return Formatter.format(self, tokensource, outfile)
 
     def format_unencoded(self, tokensource, outfile):
+        colors = self._colors
         for ttype, value in tokensource:
-            color = self.colorscheme.get(ttype)
-            while color is None:
-                ttype = ttype[:-1]
-                color = self.colorscheme.get(ttype)
-            if color:
-                color = color[self.darkbg]
+            try:
+                color = colors[ttype]
+            except KeyError:
+                color = colors.add(ttype)
+            if color is not None:
                 spl = value.split('\n')
                 for line in spl[:-1]:
                     if line:
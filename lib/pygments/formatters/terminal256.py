@@ -24,7 +24,7 @@
 #    black-on-while, so colors like "white background" need to be converted
 #    to "white background, black foreground", etc...
 
-from pygments.formatter import Formatter
+from pygments.formatter import Formatter, TokenTable
 
 
 __all__ = ['Terminal256Formatter']
@@ -98,6 +98,7 @@ class Terminal256Formatter(Formatter):
 
         self._build_color_table() # build an RGB-to-256 color conversion table
         self._setup_styles() # convert selected style's colors to term. colors
+        self._escapes = TokenTable(self._get_escapes)
 
     def _build_color_table(self):
         # colors 0..15: 16 basic colors
@@ -181,6 +182,15 @@ class Terminal256Formatter(Formatter):
             self.style_string[str(ttype)] = (escape.color_string(),
                                              escape.reset_string())
 
+    def _get_escapes(self, ttype):
+        # the (on, off) sequences of the nearest parent type with a style
+        while ttype is not None:
+            try:
+                return self.style_string[str(ttype)]
+            except KeyError:
+                ttype = ttype.parent
+        return None
+
     def format(self, tokensource, outfile):
         # hack: if the output is a terminal and has an encoding set,
         # use that to avoid unicode encode problems
@@ -190,30 +200,23 @@ class Terminal256Formatter(Formatter):
         return Formatter.format(self, tokensource, outfile)
 
     def format_unencoded(self, tokensource, outfile):
+        escapes = self._escapes
         for ttype, value in tokensource:
-            not_found = True
-            while ttype and not_found:
-                try:
-                    #outfile.write( "<" + str(ttype) + ">" )
-                    on, off = self.style_string[str(ttype)]
-
-                    # Like TerminalFormatter, add "reset colors" escape sequence
-                    # on newline.
-                    spl = value.split('\n')
-                    for line in spl[:-1]:
-                        if line:
-                            outfile.write(on + line + off)
-                        outfile.write('\n')
-                    if spl[-1]:
-                        outfile.write(on + spl[-1] + off)
-
-                    not_found = False
-                    #outfile.write( '#' + str(ttype) + '#' )
-
-                except KeyError:
-                    #ottype = ttype
-                    ttype = ttype[:-1]
-                    #outfile.write( '!' + str(ottype) + '->' + str(ttype) + '!' )
-
-            if not_found:
+            try:
+                on_off = escapes[ttype]
+            except KeyError:
+                on_off = escapes.add(ttype)
+            if on_off is None:
                 outfile.write(value)
+                continue
+            on, off = on_off
+
+            # Like TerminalFormatter, add "reset colors" escape sequence
+            # on newline.
+            spl = value.split('\n')
+            for line in spl[:-1]:
+                if line:
+                    outfile.write(on + line + off)
+                outfile.write('\n')
+            if spl[-1]:
+                outfile.write(on + spl[-1] + off)
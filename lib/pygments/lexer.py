@@ -343,6 +343,80 @@ def using(_other, **kwargs):
     return callback
 
 
+# rules using backreferences, named groups, conditionals or inline flags
+# can't be merged into an alternation with other rules
+_unmergeable_re = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?\(|\(\?[iLmsux]+\)')
+
+# Python's re module supports at most 100 groups per regex
+_MAX_MERGED_GROUPS = 99
+
+
+class _StateRules(list):
+    """
+    The processed rules of a state, a list of ``(rexmatch, action,
+    new_state)`` tuples.  `merged()` returns the same rules with runs of
+    them merged into one regex each, for `RegexLexer`.
+    """
+
+    _merged = None
+    _unmerged = None
+
+    def merged(self, merge=True):
+        """
+        Return a list of ``(rexmatch, rules, rule)`` entries to try in
+        order.  An entry either holds a single `rule`, or a regex
+        alternating between several rules, each wrapped in a group, in which
+        case `rule` is None and `rules` maps the group number found in
+        ``match.lastindex`` to the rule that matched.
+
+        With `merge` set to False every entry holds a single rule.
+        """
+        if not merge:
+            if self._unmerged is None:
+                self._unmerged = [(rule[0], None, rule) for rule in self]
+            return self._unmerged
+        if self._merged is None:
+            entries = []
+            run = []
+            groups = 0
+            for rule in self:
+                pattern = rule[0].__self__
+                if _unmergeable_re.search(pattern.pattern):
+                    self._add_run(entries, run)
+                    run = []
+                    groups = 0
+                    entries.append((rule[0], None, rule))
+                    continue
+                if groups + pattern.groups + 1 > _MAX_MERGED_GROUPS:
+                    self._add_run(entries, run)
+                    run = []
+                    groups = 0
+                run.append(rule)
+                groups += pattern.groups + 1
+            self._add_run(entries, run)
+            self._merged = entries
+        return self._merged
+
+    def _add_run(self, entries, run):
+        if len(run) == 1:
+            entries.append((run[0][0], None, run[0]))
+        elif run:
+            flags = run[0][0].__self__.flags
+            # in verbose regexes a comment on the last line of a rule
+            # would swallow the closing parenthesis
+            wrapper = flags & re.VERBOSE and '(%s\n)' or '(%s)'
+            rules = {}
+            parts = []
+            group = 1
+            for rule in run:
+                pattern = rule[0].__self__
+                rules[group] = rule
+                parts.append(wrapper % pattern.pattern)
+                group += pattern.groups + 1
+            rex = re.compile('|'.join(parts), flags)
+            entries.append((rex.match, rules, None))
+
+
 class RegexLexerMeta(LexerMeta):
     """
     Metaclass for RegexLexer, creates the self._tokens attribute from
@@ -354,7 +428,7 @@ class RegexLexerMeta(LexerMeta):
         assert state[0] != '#', "invalid state name %r" % state
         if state in processed:
             return processed[state]
-        tokens = processed[state] = []
+        tokens = processed[state] = _StateRules()
         rflags = cls.flags
         for tdef in unprocessed[state]:
             if isinstance(tdef, include):
@@ -394,7 +468,7 @@ class RegexLexerMeta(LexerMeta):
                     # combine a new state from existing ones
                     new_state = '_tmp_%d' % cls._tmpname
                     cls._tmpname += 1
-                    itokens = []
+                    itokens = _StateRules()
                     for istate in tdef2:
                         assert istate != state, 'circular state ref %r' % istate
                         itokens.extend(cls._process_state(unprocessed,
@@ -420,18 +494,35 @@ class RegexLexerMeta(LexerMeta):
             cls._process_state(tokendefs, processed, state)
         return processed
 
+    def _process_tokens(cls):
+        cls._all_tokens = {}
+        cls._tmpname = 0
+        if hasattr(cls, 'token_variants') and cls.token_variants:
+            # don't process yet
+            pass
+        else:
+            cls._tokens = cls.process_tokendef('', cls.tokens)
+
     def __call__(cls, *args, **kwds):
         if not hasattr(cls, '_tokens'):
-            cls._all_tokens = {}
-            cls._tmpname = 0
-            if hasattr(cls, 'token_variants') and cls.token_variants:
-                # don't process yet
-                pass
-            else:
-                cls._tokens = cls.process_tokendef('', cls.tokens)
+            cls._process_tokens()
 
         return type.__call__(cls, *args, **kwds)
 
+    def preload(cls):
+        """
+        Do the work that is otherwise left to the first use of the lexer:
+        process the token definitions, and compile the merged regexes that
+        `RegexLexer` builds the first time it enters each state.
+        """
+        if not hasattr(cls, '_tokens'):
+            cls._process_tokens()
+            if not hasattr(cls, '_tokens'):
+                return
+        if cls.merge_rules:
+            for rules in cls._tokens.itervalues():
+                rules.merged()
+
 
 class RegexLexer(Lexer):
     """
@@ -464,6 +555,11 @@ class RegexLexer(Lexer):
     #: current one.
     tokens = {}
 
+    #: If True, the rules of each state are tried through as few regexes as
+    #: possible, by merging consecutive rules into one alternation.  Set it
+    #: to False to try every rule with its own regex.
+    merge_rules = True
+
     def get_tokens_unprocessed(self, text, stack=('root',)):
         """
         Split ``text`` into (tokentype, text) pairs.
@@ -472,18 +568,32 @@ class RegexLexer(Lexer):
         """
         pos = 0
         tokendefs = self._tokens
+        merge = self.merge_rules
         statestack = list(stack)
         statetokens = tokendefs[statestack[-1]]
         while 1:
-            for rexmatch, action, new_state in statetokens:
+            for rexmatch, rules, rule in statetokens.merged(merge):
                 m = rexmatch(text, pos)
                 if m:
-                    if type(action) is _TokenType:
-                        yield pos, action, m.group()
+                    if rule is None:
+                        # a merged regex: find out which rule matched
+                        group = m.lastindex
+                        rule = rules[group]
+                        if type(rule[1]) is _TokenType:
+                            yield pos, rule[1], m.group(group)
+                        else:
+                            # callbacks need the groups of the rule's own
+                            # regex, so match again with it
+                            for item in rule[1](self, rule[0](text, pos)):
+                                yield item
                     else:
-                        for item in action(self, m):
-                            yield item
+                        if type(rule[1]) is _TokenType:
+                            yield pos, rule[1], m.group()
+                        else:
+                            for item in rule[1](self, m):
+                                yield item
                     pos = m.end()
+                    new_state = rule[2]
                     if new_state is not None:
                         # state transition
                         if isinstance(new_state, tuple):
@@ -539,6 +649,9 @@ class ExtendedRegexLexer(RegexLexer):
     A RegexLexer that uses a context object to store its state.
     """
 
+    # rules are always tried one by one
+    merge_rules = False
+
     def get_tokens_unprocessed(self, text=None, context=None):
         """
         Split ``text`` into (tokentype, text) pairs.
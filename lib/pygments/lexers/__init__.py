@@ -9,9 +9,10 @@
     :license: BSD, see LICENSE for details.
 """
 import sys
+import time
 import fnmatch
 import types
-from os.path import basename
+from os.path import basename, normcase
 
 try:
     set
@@ -24,10 +25,18 @@ from pygments.util import ClassNotFound, bytes
 
 
 __all__ = ['get_lexer_by_name', 'get_lexer_for_filename', 'find_lexer_class',
-           'guess_lexer'] + LEXERS.keys()
+           'guess_lexer', 'guess_lexer_among', 'get_cached_lexer',
+           'get_cached_lexer_by_name', 'preload_lexers'] + LEXERS.keys()
 
 _lexer_cache = {}
 
+#: maximum number of lexer instances kept by `get_cached_lexer`
+MAX_CACHED_LEXERS = 100
+_instance_cache = {}
+
+# lookup tables built from LEXERS on first use, see _get_indexes()
+_indexes = None
+
 
 def _load_lexers(module_name):
     """
@@ -39,6 +48,59 @@ def _load_lexers(module_name):
         _lexer_cache[cls.name] = cls
 
 
+def _get_indexes():
+    """
+    Return the lookup tables for builtin lexers as a tuple ``(names,
+    aliases, mimetypes, filenames, suffixes, patterns)``.
+
+    The first three map a name, alias or mimetype to the ``(module_name,
+    name)`` of the first lexer in `LEXERS` declaring it.  Filename patterns
+    are split into literal filenames, ``*suffix`` patterns (keyed by the
+    suffix) and a short list of other globs; each of those holds
+    ``(order, (module_name, name))`` entries, where `order` sorts matches
+    the way a scan of `LEXERS` would find them.
+    """
+    global _indexes
+    if _indexes is None:
+        names, aliases, mimetypes = {}, {}, {}
+        filenames, suffixes, patterns = {}, {}, []
+        order = 0
+        for module_name, name, lexer_aliases, lexer_filenames, \
+                lexer_mimetypes in LEXERS.itervalues():
+            info = (module_name, name)
+            names.setdefault(name, info)
+            for alias in lexer_aliases:
+                aliases.setdefault(alias, info)
+            for mimetype in lexer_mimetypes:
+                mimetypes.setdefault(mimetype, info)
+            for filename in lexer_filenames:
+                entry = (order, info)
+                order += 1
+                filename = normcase(filename)
+                if not _has_wildcards(filename):
+                    filenames.setdefault(filename, []).append(entry)
+                elif filename[:1] == '*' and not _has_wildcards(filename[1:]):
+                    suffixes.setdefault(filename[1:], []).append(entry)
+                else:
+                    patterns.append((filename, entry))
+        _indexes = (names, aliases, mimetypes, filenames, suffixes, patterns)
+    return _indexes
+
+
+def _has_wildcards(pattern):
+    return '*' in pattern or '?' in pattern or '[' in pattern
+
+
+def _load_lexer(info):
+    """
+    Return the lexer class for a ``(module_name, name)`` index entry.
+    """
+    module_name, name = info
+    if name not in _lexer_cache:
+        _load_lexers(module_name)
+    return _lexer_cache[name]
+
+
 def get_all_lexers():
     """
     Return a generator of tuples in the form ``(name, aliases,
@@ -57,47 +119,108 @@ def find_lexer_class(name):
     if name in _lexer_cache:
         return _lexer_cache[name]
     # lookup builtin lexers
-    for module_name, lname, aliases, _, _ in LEXERS.itervalues():
-        if name == lname:
-            _load_lexers(module_name)
-            return _lexer_cache[name]
+    info = _get_indexes()[0].get(name)
+    if info:
+        return _load_lexer(info)
     # continue with lexers from setuptools entrypoints
     for cls in find_plugin_lexers():
         if cls.name == name:
             return cls
 
 
-def get_lexer_by_name(_alias, **options):
+def _find_lexer_class_by_alias(_alias):
     """
-    Get a lexer by an alias.
+    Lookup a lexer class by an alias. Raise ClassNotFound if not found.
     """
     # lookup builtin lexers
-    for module_name, name, aliases, _, _ in LEXERS.itervalues():
-        if _alias in aliases:
-            if name not in _lexer_cache:
-                _load_lexers(module_name)
-            return _lexer_cache[name](**options)
+    info = _get_indexes()[1].get(_alias)
+    if info:
+        return _load_lexer(info)
     # continue with lexers from setuptools entrypoints
     for cls in find_plugin_lexers():
         if _alias in cls.aliases:
-            return cls(**options)
+            return cls
     raise ClassNotFound('no lexer for alias %r found' % _alias)
 
 
+def get_lexer_by_name(_alias, **options):
+    """
+    Get a lexer by an alias.
+    """
+    return _find_lexer_class_by_alias(_alias)(**options)
+
+
+def get_cached_lexer(cls, **options):
+    """
+    Get an instance of the lexer class `cls` for the given options, reusing
+    the instance of an earlier call with the same class and options.
+
+    Lexing does not change a lexer, so instances can be shared, but the
+    returned lexer must not be modified (e.g. with ``add_filter``).  Calls
+    with unhashable option values always get a new instance.
+    """
+    try:
+        key = (cls, tuple(sorted(options.iteritems())))
+        return _instance_cache[key]
+    except KeyError:
+        pass
+    except TypeError:
+        return cls(**options)
+    if len(_instance_cache) >= MAX_CACHED_LEXERS:
+        _instance_cache.clear()
+    lexer = _instance_cache[key] = cls(**options)
+    return lexer
+
+
+def get_cached_lexer_by_name(_alias, **options):
+    """
+    Like `get_lexer_by_name`, but return a shared instance, see
+    `get_cached_lexer`.
+    """
+    return get_cached_lexer(_find_lexer_class_by_alias(_alias), **options)
+
+
+def preload_lexers(aliases):
+    """
+    Load the lexers for the given aliases ahead of their first use, e.g.
+    while a new process warms up.  Their modules are imported, their
+    regexes compiled and an instance is left for `get_cached_lexer_by_name`.
+
+    Return a dict mapping each alias to the seconds it took to load, so
+    the cost of each lexer can be measured.  Unknown aliases are left out.
+    """
+    timings = {}
+    for alias in aliases:
+        start = time.time()
+        try:
+            cls = _find_lexer_class_by_alias(alias)
+        except ClassNotFound:
+            continue
+        if hasattr(cls, 'preload'):
+            cls.preload()
+        get_cached_lexer(cls)
+        timings[alias] = time.time() - start
+    return timings
+
+
 def get_lexer_for_filename(_fn, code=None, **options):
     """
     Get a lexer for a filename.  If multiple lexers match the filename
     pattern, use ``analyze_text()`` to figure out which one is more
     appropriate.
     """
-    matches = []
     fn = basename(_fn)
-    for modname, name, _, filenames, _ in LEXERS.itervalues():
-        for filename in filenames:
-            if fnmatch.fnmatch(fn, filename):
-                if name not in _lexer_cache:
-                    _load_lexers(modname)
-                matches.append(_lexer_cache[name])
+    _, _, _, filenames, suffixes, patterns = _get_indexes()
+    key = normcase(fn)
+    found = list(filenames.get(key, ()))
+    for i in xrange(len(key) + 1):
+        if key[i:] in suffixes:
+            found.extend(suffixes[key[i:]])
+    for pattern, entry in patterns:
+        if fnmatch.fnmatchcase(key, pattern):
+            found.append(entry)
+    found.sort()
+    matches = [_load_lexer(info) for _, info in found]
     for cls in find_plugin_lexers():
         for filename in cls.filenames:
             if fnmatch.fnmatch(fn, filename):
@@ -128,11 +251,9 @@ def get_lexer_for_mimetype(_mime, **options):
     """
     Get a lexer for a mimetype.
     """
-    for modname, name, _, _, mimetypes in LEXERS.itervalues():
-        if _mime in mimetypes:
-            if name not in _lexer_cache:
-                _load_lexers(modname)
-            return _lexer_cache[name](**options)
+    info = _get_indexes()[2].get(_mime)
+    if info:
+        return _load_lexer(info)(**options)
     for cls in find_plugin_lexers():
         if _mime in cls.mimetypes:
             return cls(**options)
@@ -198,8 +319,23 @@ def guess_lexer(_text, **options):
     """
     Guess a lexer by strong distinctions in the text (eg, shebang).
     """
+    return _guess_lexer(_iter_lexerclasses(), _text, options)
+
+
+def guess_lexer_among(_aliases, _text, **options):
+    """
+    Like `guess_lexer`, but only consider the lexers for the given aliases.
+    Only the modules defining those lexers are imported.
+    """
+    aliases = _get_indexes()[1]
+    lexers = [_load_lexer(aliases[_alias]) for _alias in _aliases
+              if _alias in aliases]
+    return _guess_lexer(lexers, _text, options)
+
+
+def _guess_lexer(lexers, _text, options):
     best_lexer = [0.0, None]
-    for lexer in _iter_lexerclasses():
+    for lexer in lexers:
         rv = lexer.analyse_text(_text)
         if rv == 1.0:
             return lexer(**options)
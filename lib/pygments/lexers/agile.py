@@ -1010,6 +1010,9 @@ class LuaLexer(RegexLexer):
     filenames = ['*.lua']
     mimetypes = ['text/x-lua', 'application/x-lua']
 
+    #: builtin function names for each set of disabled modules
+    _function_sets = {}
+
     tokens = {
         'root': [
             (r'(?s)--\[(=*)\[.*?\]\1\]', Comment.Multiline),
@@ -1080,12 +1083,19 @@ class LuaLexer(RegexLexer):
             options, 'func_name_highlighting', True)
         self.disabled_modules = get_list_opt(options, 'disabled_modules', [])
 
-        self._functions = set()
+        self._functions = frozenset()
         if self.func_name_highlighting:
-            from pygments.lexers._luabuiltins import MODULES
-            for mod, func in MODULES.iteritems():
-                if mod not in self.disabled_modules:
-                    self._functions.update(func)
+            disabled = frozenset(self.disabled_modules)
+            functions = self._function_sets.get(disabled)
+            if functions is None:
+                from pygments.lexers._luabuiltins import MODULES
+                functions = set()
+                for mod, func in MODULES.iteritems():
+                    if mod not in disabled:
+                        functions.update(func)
+                functions = self._function_sets[disabled] = \
+                    frozenset(functions)
+            self._functions = functions
         RegexLexer.__init__(self, **options)
 
     def get_tokens_unprocessed(self, text):
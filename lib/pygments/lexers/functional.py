@@ -176,43 +176,37 @@ class CommonLispLexer(RegexLexer):
     # Take a deep breath...
     symbol = r'(\|[^|]+\||(?:%s)(?:%s)*)' % (nonmacro, constituent)
 
+    #: maps each builtin name to its token type, built on first use
+    _builtins = None
+
     def __init__(self, **options):
-        from pygments.lexers._clbuiltins import BUILTIN_FUNCTIONS, \
-            SPECIAL_FORMS, MACROS, LAMBDA_LIST_KEYWORDS, DECLARATIONS, \
-            BUILTIN_TYPES, BUILTIN_CLASSES
-        self.builtin_function = BUILTIN_FUNCTIONS
-        self.special_forms = SPECIAL_FORMS
-        self.macros = MACROS
-        self.lambda_list_keywords = LAMBDA_LIST_KEYWORDS
-        self.declarations = DECLARATIONS
-        self.builtin_types = BUILTIN_TYPES
-        self.builtin_classes = BUILTIN_CLASSES
+        if CommonLispLexer._builtins is None:
+            from pygments.lexers._clbuiltins import BUILTIN_FUNCTIONS, \
+                SPECIAL_FORMS, MACROS, LAMBDA_LIST_KEYWORDS, DECLARATIONS, \
+                BUILTIN_TYPES, BUILTIN_CLASSES
+            builtins = {}
+            # in reverse order, so a name in several lists gets the type of
+            # the first one
+            for names, ttype in ((BUILTIN_CLASSES, Name.Class),
+                                 (BUILTIN_TYPES, Keyword.Type),
+                                 (DECLARATIONS, Keyword),
+                                 (LAMBDA_LIST_KEYWORDS, Keyword),
+                                 (MACROS, Name.Builtin),
+                                 (SPECIAL_FORMS, Keyword),
+                                 (BUILTIN_FUNCTIONS, Name.Builtin)):
+                for name in names:
+                    builtins[name] = ttype
+            CommonLispLexer._builtins = builtins
         RegexLexer.__init__(self, **options)
 
     def get_tokens_unprocessed(self, text):
         stack = ['root']
+        builtins = self._builtins
         for index, token, value in RegexLexer.get_tokens_unprocessed(self, text, stack):
             if token is Name.Variable:
-                if value in self.builtin_function:
-                    yield index, Name.Builtin, value
-                    continue
-                if value in self.special_forms:
-                    yield index, Keyword, value
-                    continue
-                if value in self.macros:
-                    yield index, Name.Builtin, value
-                    continue
-                if value in self.lambda_list_keywords:
-                    yield index, Keyword, value
-                    continue
-                if value in self.declarations:
-                    yield index, Keyword, value
-                    continue
-                if value in self.builtin_types:
-                    yield index, Keyword.Type, value
-                    continue
-                if value in self.builtin_classes:
-                    yield index, Name.Class, value
+                ttype = builtins.get(value)
+                if ttype is not None:
+                    yield index, ttype, value
                     continue
             yield index, token, value
 
@@ -484,6 +484,9 @@ class PhpLexer(RegexLexer):
     filenames = ['*.php', '*.php[345]']
     mimetypes = ['text/x-php']
 
+    #: builtin function names for each set of disabled modules
+    _function_sets = {}
+
     flags = re.IGNORECASE | re.DOTALL | re.MULTILINE
     tokens = {
         'root': [
@@ -566,13 +569,21 @@ class PhpLexer(RegexLexer):
         if '_startinline' in options:
             self.startinline = options.pop('_startinline')
 
-        # collect activated functions in a set
-        self._functions = set()
+        # collect activated functions in a set, shared by all lexers with
+        # the same disabled modules (using() makes one per interpolation)
+        self._functions = frozenset()
         if self.funcnamehighlighting:
-            from pygments.lexers._phpbuiltins import MODULES
-            for key, value in MODULES.iteritems():
-                if key not in self.disabledmodules:
-                    self._functions.update(value)
+            disabled = frozenset(self.disabledmodules)
+            functions = self._function_sets.get(disabled)
+            if functions is None:
+                from pygments.lexers._phpbuiltins import MODULES
+                functions = set()
+                for key, value in MODULES.iteritems():
+                    if key not in disabled:
+                        functions.update(value)
+                functions = self._function_sets[disabled] = \
+                    frozenset(functions)
+            self._functions = functions
         RegexLexer.__init__(self, **options)
 
     def get_tokens_unprocessed(self, text):
@@ -29,11 +29,13 @@ class _TokenType(tuple):
     def __init__(self, *args):
         # no need to call super.__init__
         self.subtypes = set()
+        # this type and all of its parents, for fast subtype tests
+        self.ancestors = frozenset([self])
 
     def __contains__(self, val):
         return self is val or (
             type(val) is self.__class__ and
-            val[:len(self)] == self
+            self in val.ancestors
         )
 
     def __getattr__(self, val):
@@ -43,10 +45,11 @@ class _TokenType(tuple):
         setattr(self, val, new)
         self.subtypes.add(new)
         new.parent = self
+        new.ancestors = self.ancestors | new.ancestors
         return new
 
-    def __hash__(self):
-        return hash(tuple(self))
+    # the same hash as tuple(self), without a Python level call per lookup
+    __hash__ = tuple.__hash__
 
     def __repr__(self):
         return 'Token' + (self and '.' or '') + '.'.join(self)
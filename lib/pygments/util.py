@@ -198,6 +198,21 @@ def looks_like_xml(text):
         _looks_like_xml_cache[key] = rv
         return rv
 
+class ChunkWriter(object):
+    """
+    A file-like object that appends everything written to it to the list
+    ``chunks``, so formatted output can go straight into a caller's buffer
+    without being copied into a string first.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.write = chunks.append
+
+    def flush(self):
+        pass
+
+
 # Python 2/3 compatibility
 
 if sys.version_info < (3,0):
@@ -92,6 +92,35 @@ class Item(db.Expando):
     def get_by_slug(klass, slug):
         return klass.all_published().filter('slug', slug).get()
 
+    # Feed helpers
+    @property
+    def feed_entry_key(self):
+        """Memcache key for the item's feed entry, changes on every update"""
+        return 'feed_entry:%s:%s' % (self.key(), self.updated_date.isoformat())
+
+    @classmethod
+    def get_feed_entries(klass, items, site_host):
+        """Atom entries for the items, in order. Entries are cached by
+        updated_date, so only items changed since the last request are
+        rendered again
+        """
+        # site_host may not be configured, use the same empty host as the
+        # feed header then, memcache needs a string prefix anyway
+        site_host = site_host or ''
+        keys = [item.feed_entry_key for item in items]
+        entries = memcache.get_multi(keys, key_prefix=site_host)
+
+        missing = {}
+        for key, item in zip(keys, items):
+            if key not in entries:
+                entries[key] = missing[key] = helpers.atom_entry(item, site_host)
+
+        if missing:
+            logging.info('Feed entry cache miss for %d items' % len(missing))
+            memcache.set_multi(missing, key_prefix=site_host)
+
+        return [entries[key] for key in keys]
+
     # Slug helper properties
     @property
     def is_root(self):
@@ -113,7 +142,9 @@ class Item(db.Expando):
         self.content = content
 
         # Extract fields and convert to html
-        self.content_html, data = helpers.process_content(content, self.publish_date)
+        code_language = Setting.get_dictionary().get('code_language')
+        self.content_html, data = helpers.process_content(content,
+                self.publish_date, code_language)
 
         # Assign extracted data if there
         if 'date' in data:
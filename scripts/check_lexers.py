@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""Check and benchmark the merged rule regexes of RegexLexer
+
+    check_lexers.py compare [FILE ...]
+    check_lexers.py bench [FILE ...]
+
+`compare` lexes every file with each bundled RegexLexer whose filename
+patterns match it, once with merge_rules on and once with it off, and exits
+with status 1 if any of them gives different tokens. Lexers are not given
+files meant for other languages, some of them never finish on those.
+
+`bench` lexes each file with the lexer for its filename and prints the
+throughput in tokens/s both ways, best of 3.
+
+Without files the Python, HTML and CSS sources of this repository are used.
+"""
+import fnmatch
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lib'))
+
+from pygments.lexer import RegexLexer
+from pygments.lexers import LEXERS, find_lexer_class, get_lexer_for_filename
+from pygments.util import ClassNotFound
+
+SAMPLE_GLOBS = ['*.py', 'lib/*.py', 'lib/markdown/*.py',
+                'lib/markdown/extensions/*.py', 'lib/pygments/lexers/web.py',
+                'templates/*.html', 'templates/admin/*.html',
+                'static/css/*.css']
+
+
+def sample_files():
+    files = []
+    for pattern in SAMPLE_GLOBS:
+        files.extend(sorted(glob.glob(os.path.join(ROOT, pattern))))
+    return files
+
+def read(filename):
+    source = open(filename).read()
+    try:
+        return source.decode('utf-8')
+    except UnicodeDecodeError:
+        return source.decode('latin-1')
+
+def lex(lexer, text, merge):
+    lexer.merge_rules = merge
+    return list(lexer.get_tokens_unprocessed(text))
+
+def regex_lexers():
+    """Instances of every bundled RegexLexer, sorted by name"""
+    lexers = []
+    for name in sorted([info[1] for info in LEXERS.itervalues()]):
+        cls = find_lexer_class(name)
+        if issubclass(cls, RegexLexer):
+            lexers.append(cls())
+    return lexers
+
+def matches(lexer, filename):
+    filename = os.path.basename(filename)
+    for pattern in lexer.filenames:
+        if fnmatch.fnmatch(filename, pattern):
+            return True
+    return False
+
+def compare(files):
+    failures = 0
+    for lexer in regex_lexers():
+        lexer_files = [filename for filename in files
+                       if matches(lexer, filename)]
+        if not lexer_files:
+            continue
+        for filename in lexer_files:
+            text = read(filename)
+            if lex(lexer, text, True) != lex(lexer, text, False):
+                print 'MISMATCH %s: %s' % (lexer.name, filename)
+                failures += 1
+                break
+        else:
+            print 'ok %s (%d files)' % (lexer.name, len(lexer_files))
+    return failures and 1 or 0
+
+def best_rate(lexer, text, merge, runs=3):
+    best = None
+    for run in xrange(runs):
+        start = time.time()
+        count = len(lex(lexer, text, merge))
+        elapsed = max(time.time() - start, 1e-6)
+        if best is None or elapsed < best:
+            best = elapsed
+    return count / best
+
+def bench(files):
+    # lex all files of the same lexer as one text
+    texts = {}
+    for filename in files:
+        try:
+            lexer = get_lexer_for_filename(filename)
+        except ClassNotFound:
+            print 'skipped %s: no lexer' % filename
+            continue
+        if not isinstance(lexer, RegexLexer):
+            print 'skipped %s: %s is not a RegexLexer' % (filename, lexer.name)
+            continue
+        texts.setdefault(lexer.name, [lexer, []])[1].append(read(filename))
+    print '%-20s %12s %12s %8s' % ('lexer', 'unmerged', 'merged', 'speedup')
+    for name in sorted(texts):
+        lexer, sources = texts[name]
+        text = u'\n'.join(sources)
+        unmerged = best_rate(lexer, text, False)
+        merged = best_rate(lexer, text, True)
+        print '%-20s %10.0f/s %10.0f/s %7.2fx' % (name, unmerged, merged,
+                                                  merged / unmerged)
+    return 0
+
+def main(args):
+    if not args or args[0] not in ('compare', 'bench'):
+        print __doc__
+        return 2
+    files = args[1:] or sample_files()
+    if args[0] == 'compare':
+        return compare(files)
+    return bench(files)
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
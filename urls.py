@@ -13,6 +13,7 @@ SITE_ROUTES = [
     ('/$', handlers.RootHandler),
     ('/feed$', handlers.FeedHandler),
     ('/archives?$', handlers.ArchiveHandler),
+    ('/_ah/warmup$', handlers.WarmupHandler),
     ('(.+?)$', handlers.SiteHandler)
 ]
 